@@ -0,0 +1,108 @@
+"""
+Стоимость сериализации страницы задач: стандартный путь FastAPI
+(ORM-объекты -> проверка response_model -> jsonable_encoder -> JSONResponse)
+против rows_page_response (строки выборки -> orjson). БД не нужна:
+задачи и строки строятся в памяти, так что измеряется только
+сериализация, без SQL.
+
+    python -m benchmarks.json_responses --rows 50 500 --repeat 200
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.common.fast_json import rows_page_response
+from src.common.pagination import Page
+from src.task.models import Task
+from src.task.repository import TaskRepository
+from src.task.schemas import GetTaskSchema
+from src.user.models import User  # noqa: F401  регистрирует модель для relationship
+
+RESPONSE_FIELD = create_response_field(name="response", type_=Page[GetTaskSchema])
+
+
+def make_tasks(count: int) -> list[Task]:
+    now = datetime.now(timezone.utc)
+    return [
+        Task(
+            id=n,
+            title=f"Задача {n}",
+            description="описание " * 5 if n % 2 else None,
+            priority=n,
+            rank=n << 16,
+            is_completed=n % 3 == 0,
+            user_id=1,
+            created_at=now,
+            updated_at=now,
+        )
+        for n in range(1, count + 1)
+    ]
+
+
+def make_rows(tasks: list[Task]) -> list[tuple]:
+    columns = [column.key for column in TaskRepository.row_columns]
+    return [
+        (*(getattr(task, name) for name in columns), task.rank) for task in tasks
+    ]
+
+
+async def default_path(tasks: list[Task]) -> bytes:
+    content = await serialize_response(
+        field=RESPONSE_FIELD,
+        response_content={"items": tasks, "next_cursor": "cursor"},
+    )
+    return JSONResponse(content).body
+
+
+async def fast_path(rows: list[tuple]) -> bytes:
+    page = {"items": rows, "next_cursor": "cursor"}
+    return rows_page_response(page, TaskRepository.row_columns).body
+
+
+async def measure(render, payload, repeat: int) -> dict:
+    body = await render(payload)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await render(payload)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    await render(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ms_per_page": elapsed / repeat * 1000,
+        "pages_per_s": repeat / elapsed,
+        "peak_kib": peak / 1024,
+        "body": body,
+    }
+
+
+async def main(sizes: list[int], repeat: int) -> None:
+    print(f"{'rows':>6} {'path':<8} {'ms/page':>9} {'pages/s':>9} {'peak KiB':>9}")
+    for size in sizes:
+        tasks = make_tasks(size)
+        rows = make_rows(tasks)
+        default = await measure(default_path, tasks, repeat)
+        fast = await measure(fast_path, rows, repeat)
+        assert default["body"] == fast["body"], "responses differ"
+        for name, result in (("default", default), ("orjson", fast)):
+            print(
+                f"{size:>6} {name:<8} {result['ms_per_page']:>9.3f}"
+                f" {result['pages_per_s']:>9.0f} {result['peak_kib']:>9.1f}"
+            )
+        print(f"{'':>6} speedup  {default['ms_per_page'] / fast['ms_per_page']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,380 @@
+"""
+Нагрузочный прогон приложения в процессе, без сети и uvicorn.
+
+src.main:app (вместе с lifespan) вызывается через httpx.ASGITransport
+против локальной базы из DB_* окружения. Каждый сценарий — замкнутый цикл:
+concurrency виртуальных пользователей со своими cookie шлют запросы
+duration секунд. Для каждого эндпоинта считаются запросы в секунду,
+ошибки и p50/p95/p99 латентности; итог печатается (и пишется в --output)
+JSON-ом, чтобы сравнивать коммиты между собой:
+
+    python -m benchmarks.loadtest --concurrency 20 --duration 15 --output before.json
+    python -m benchmarks.loadtest --scenarios task_crud list_reads
+
+Сценарии:
+    auth_storm   регистрация и серия логинов (bcrypt, jwt_auth, кэш пользователей)
+    task_crud    смесь create/get/update/complete/move/delete/list
+    list_reads   постраничное чтение больших списков, включая 304 по ETag
+    admin_dumps  админские списки и потоковые выгрузки NDJSON/CSV
+
+Все виртуальные пользователи приходят с одного IP, поэтому для замера
+самого auth_storm запускайте с RATE_LIMIT_ENABLED=false, иначе большая
+часть логинов получит 429 от ограничителя частоты.
+
+Созданные пользователи (домен loadtest.invalid) и их задачи удаляются
+в конце. Запускать только против одноразовой/локальной базы.
+"""
+import argparse
+import asyncio
+import itertools
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+import orjson
+from sqlalchemy import text
+
+from src.common.database import engine
+from src.main import app
+
+EMAIL_DOMAIN = "loadtest.invalid"
+PASSWORD = "LoadTest!Pw"
+BULK_CHUNK = 500
+
+
+class Recorder:
+    """Латентности и ошибки по метке эндпоинта ("GET /api/tasks")."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        label: str,
+        method: str,
+        url: str,
+        expected: tuple[int, ...] = (200,),
+        **kwargs,
+    ) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        # Для потоковых ответов в латентность входит чтение всего тела
+        await response.aread()
+        self.latencies[label].append(time.perf_counter() - started)
+        if response.status_code not in expected:
+            self.errors[label] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label, samples in sorted(self.latencies.items()):
+            samples.sort()
+            endpoints[label] = {
+                "requests": len(samples),
+                "errors": self.errors[label],
+                "rps": round(len(samples) / elapsed, 1),
+                "p50_ms": _percentile_ms(samples, 50),
+                "p95_ms": _percentile_ms(samples, 95),
+                "p99_ms": _percentile_ms(samples, 99),
+                "max_ms": round(samples[-1] * 1000, 2),
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "rps": round(total / elapsed, 1),
+            "elapsed_s": round(elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+def _percentile_ms(sorted_samples: list[float], percentile: int) -> float:
+    """Процентиль методом ближайшего ранга, в миллисекундах."""
+    rank = max(1, -(-percentile * len(sorted_samples) // 100))
+    return round(sorted_samples[rank - 1] * 1000, 2)
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://loadtest"
+    )
+
+
+def _email() -> str:
+    return f"{uuid.uuid4().hex[:12]}@{EMAIL_DOMAIN}"
+
+
+async def _register(rec: Recorder, client: httpx.AsyncClient) -> str:
+    email = _email()
+    await rec.request(
+        client,
+        "POST /api/user/register",
+        "POST",
+        "/api/user/register",
+        json={"email": email, "password": PASSWORD},
+    )
+    return email
+
+
+async def _seed_tasks(client: httpx.AsyncClient, count: int) -> None:
+    for start in range(0, count, BULK_CHUNK):
+        operations = [
+            {"op": "create", "data": {"title": f"seed {n}", "description": "loadtest"}}
+            for n in range(start, min(count, start + BULK_CHUNK))
+        ]
+        response = await client.post("/api/tasks/bulk", json={"operations": operations})
+        response.raise_for_status()
+
+
+async def auth_storm(rec: Recorder, client: httpx.AsyncClient, deadline: float, _):
+    while time.perf_counter() < deadline:
+        email = await _register(rec, client)
+        for _ in range(3):
+            await rec.request(
+                client,
+                "POST /api/user/login",
+                "POST",
+                "/api/user/login",
+                json={"email": email, "password": PASSWORD},
+            )
+        await rec.request(
+            client,
+            "POST /api/user/login (wrong password)",
+            "POST",
+            "/api/user/login",
+            expected=(401,),
+            json={"email": email, "password": "Wrong!Pw"},
+        )
+        await rec.request(
+            client, "GET /api/user/get_current", "GET", "/api/user/get_current"
+        )
+
+
+async def task_crud(rec: Recorder, client: httpx.AsyncClient, deadline: float, _):
+    await _register(rec, client)
+    task_ids: list[int] = []
+    counter = itertools.count()
+    while time.perf_counter() < deadline:
+        action = random.choices(
+            ("create", "get", "update", "complete", "move", "delete", "list"),
+            weights=(30, 20, 15, 10, 5, 10, 10),
+        )[0]
+        if action == "create" or len(task_ids) < 2:
+            response = await rec.request(
+                client,
+                "POST /api/tasks",
+                "POST",
+                "/api/tasks",
+                json={"title": f"task {next(counter)}", "priority": 0},
+            )
+            if response.status_code == 200:
+                task_ids.append(response.json()["id"])
+        elif action == "get":
+            await rec.request(
+                client,
+                "GET /api/tasks/{task_id}",
+                "GET",
+                f"/api/tasks/{random.choice(task_ids)}",
+            )
+        elif action == "update":
+            await rec.request(
+                client,
+                "PUT /api/tasks/{task_id}",
+                "PUT",
+                f"/api/tasks/{random.choice(task_ids)}",
+                json={"title": f"renamed {next(counter)}"},
+            )
+        elif action == "complete":
+            await rec.request(
+                client,
+                "PATCH /api/tasks/{task_id}/complete",
+                "PATCH",
+                f"/api/tasks/{random.choice(task_ids)}/complete",
+            )
+        elif action == "move":
+            task_id, anchor_id = random.sample(task_ids, 2)
+            await rec.request(
+                client,
+                "PATCH /api/tasks/{task_id}/move",
+                "PATCH",
+                f"/api/tasks/{task_id}/move",
+                json={"before_id": anchor_id},
+            )
+        elif action == "delete":
+            task_id = task_ids.pop(random.randrange(len(task_ids)))
+            await rec.request(
+                client, "DELETE /api/tasks/{task_id}", "DELETE", f"/api/tasks/{task_id}"
+            )
+        else:
+            await rec.request(
+                client, "GET /api/tasks", "GET", "/api/tasks", params={"limit": 50}
+            )
+
+
+async def seeded_user(client: httpx.AsyncClient, options) -> None:
+    await _register(Recorder(), client)
+    await _seed_tasks(client, options.list_tasks)
+
+
+async def list_reads(rec: Recorder, client: httpx.AsyncClient, deadline: float, options):
+    etag = None
+    while time.perf_counter() < deadline:
+        cursor = None
+        while time.perf_counter() < deadline:
+            params = {"limit": options.page_size}
+            if cursor is not None:
+                params["cursor"] = cursor
+            response = await rec.request(
+                client, "GET /api/tasks (page)", "GET", "/api/tasks", params=params
+            )
+            if response.status_code != 200:
+                break
+            if cursor is None:
+                etag = response.headers.get("etag")
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+        if etag:
+            await rec.request(
+                client,
+                "GET /api/tasks (If-None-Match)",
+                "GET",
+                "/api/tasks",
+                expected=(304,),
+                params={"limit": options.page_size},
+                headers={"If-None-Match": etag},
+            )
+
+
+async def admin_dumps(rec: Recorder, client: httpx.AsyncClient, deadline: float, options):
+    while time.perf_counter() < deadline:
+        cursor = None
+        for _ in range(options.admin_pages):
+            params = {"limit": options.page_size}
+            if cursor is not None:
+                params["cursor"] = cursor
+            response = await rec.request(
+                client, "GET /api/admin/tasks", "GET", "/api/admin/tasks", params=params
+            )
+            cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+            if cursor is None:
+                break
+        await rec.request(
+            client,
+            "GET /api/admin/export/users",
+            "GET",
+            "/api/admin/export/users",
+            params={"format": "ndjson"},
+        )
+        await rec.request(
+            client,
+            "GET /api/admin/export/tasks?format=csv",
+            "GET",
+            "/api/admin/export/tasks",
+            params={"format": "csv", "is_completed": "true"},
+        )
+
+
+# Сценарий: (подготовка клиента вне замера или None, нагрузочный цикл)
+SCENARIOS = {
+    "auth_storm": (None, auth_storm),
+    "task_crud": (None, task_crud),
+    "list_reads": (seeded_user, list_reads),
+    "admin_dumps": (None, admin_dumps),
+}
+
+
+async def run_scenario(name: str, options) -> dict:
+    rec = Recorder()
+    setup, scenario = SCENARIOS[name]
+    clients = [_client() for _ in range(options.concurrency)]
+    try:
+        if setup is not None:
+            await asyncio.gather(*(setup(client, options) for client in clients))
+        elif name == "admin_dumps":
+            # Чтобы выгрузкам было что читать, даже если сценарий запущен один
+            await seeded_user(clients[0], options)
+        started = time.perf_counter()
+        deadline = started + options.duration
+        await asyncio.gather(
+            *(scenario(rec, client, deadline, options) for client in clients)
+        )
+    finally:
+        for client in clients:
+            await client.aclose()
+    return rec.report(time.perf_counter() - started)
+
+
+async def cleanup() -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "DELETE FROM tasks WHERE user_id IN "
+                "(SELECT id FROM users WHERE email LIKE '%@' || :domain)"
+            ),
+            {"domain": EMAIL_DOMAIN},
+        )
+        await conn.execute(
+            text("DELETE FROM users WHERE email LIKE '%@' || :domain"),
+            {"domain": EMAIL_DOMAIN},
+        )
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(options) -> dict:
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "concurrency": options.concurrency,
+            "duration_s": options.duration,
+        },
+        "scenarios": {},
+    }
+    async with app.router.lifespan_context(app):
+        try:
+            for name in options.scenarios:
+                print(f"running {name}...", file=sys.stderr)
+                report["scenarios"][name] = await run_scenario(name, options)
+        finally:
+            await cleanup()
+    await engine.dispose()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=15, help="секунд на сценарий")
+    parser.add_argument("--list-tasks", type=int, default=2000, help="задач для list_reads")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--admin-pages", type=int, default=5)
+    parser.add_argument("--output", help="файл для JSON-отчёта")
+    args = parser.parse_args()
+    result = orjson.dumps(asyncio.run(main(args)), option=orjson.OPT_INDENT_2)
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(result)
+    sys.stdout.write(result.decode() + "\n")
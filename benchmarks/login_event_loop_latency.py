@@ -0,0 +1,68 @@
+"""
+Задержка event loop при пачке одновременных логинов.
+
+Запускает N одновременных проверок пароля и параллельно «тикер»,
+который каждые 5 мс измеряет, насколько опоздал его wakeup. Сравниваются
+синхронный verify_password внутри корутины (как было) и check_password
+в пуле password_executor. БД не нужна.
+
+    python -m benchmarks.login_event_loop_latency --logins 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.common import jwt_auth
+
+TICK = 0.005
+
+
+async def _ticker(lags: list[float], stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(TICK)
+        lags.append(loop.time() - started - TICK)
+
+
+async def _blocking_login(password: str, hashed: str) -> bool:
+    return jwt_auth.verify_password(password, hashed)
+
+
+async def _offloaded_login(password: str, hashed: str) -> bool:
+    return await jwt_auth.check_password(password, hashed)
+
+
+async def _run(login, logins: int, password: str, hashed: str) -> dict:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    await asyncio.sleep(TICK * 2)
+    started = time.perf_counter()
+    await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "wall_s": round(elapsed, 3),
+        "loop_lag_p50_ms": round(statistics.median(lags_ms), 2),
+        "loop_lag_p99_ms": round(lags_ms[int(len(lags_ms) * 0.99) - 1], 2),
+        "loop_lag_max_ms": round(lags_ms[-1], 2),
+    }
+
+
+async def main(logins: int) -> None:
+    password = "AB!cdef"
+    hashed = jwt_auth.get_password_hash(password)
+    print(f"{logins} concurrent logins, {jwt_auth.PASSWORD_HASH_WORKERS} hash workers")
+    for name, login in (("inline", _blocking_login), ("executor", _offloaded_login)):
+        print(f"{name:>9}: {await _run(login, logins, password, hashed)}")
+    jwt_auth.password_executor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32)
+    asyncio.run(main(parser.parse_args().logins))
@@ -0,0 +1,239 @@
+"""
+Процессорное время Python-слоя на один вызов горячих запросов
+репозиториев: запрос, собираемый заново на каждый вызов (как было),
+против lambda_stmt / кэша готовых UPDATE в TaskRepository и UserRepository.
+
+Прежние реализации — подклассы репозиториев с той же обвязкой (сессия,
+разбор результата), поэтому разница между ними — построение конструкции
+и ключа кэша компиляции. Время считается через time.process_time, т.е.
+без ожидания ответа БД; реализации замеряются по очереди несколько
+раундов, в отчёте медиана. Запросы выполняются против локальной базы (DB_* окружения)
+в одной транзакции, которая в конце откатывается; засеянный пользователь
+удаляется. Размер кэша подготовленных выражений asyncpg задаётся
+DB_PREPARED_STATEMENT_CACHE_SIZE (0 — без кэша), его влияние видно,
+если запустить скрипт с разными значениями:
+
+    python -m benchmarks.statement_cache --calls 500 --rounds 7
+    DB_PREPARED_STATEMENT_CACHE_SIZE=0 python -m benchmarks.statement_cache
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select, text, tuple_, update
+
+from src.common.config import DB_PREPARED_STATEMENT_CACHE_SIZE
+from src.common.database import async_session_maker, engine
+from src.common.exceptions import TaskNotExist
+from src.common.pagination import (
+    DEFAULT_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    split_page,
+)
+from src.task.repository import TaskRepository
+from src.user.models import User
+from src.user.repository import UserRepository
+
+SEED_EMAIL = "bench@statement-cache.invalid"
+SEED_TASKS = 200
+PAGE_SIZE = 50
+
+
+async def seed() -> tuple[int, list[int]]:
+    async with engine.begin() as conn:
+        res = await conn.execute(
+            text(
+                """
+                INSERT INTO users (email, password, created_at, updated_at)
+                VALUES (:email, 'x', now(), now())
+                RETURNING id
+                """
+            ),
+            {"email": SEED_EMAIL},
+        )
+        user_id = res.scalar_one()
+        res = await conn.execute(
+            text(
+                """
+                INSERT INTO tasks (title, description, priority, rank, is_completed,
+                                   user_id, created_at, updated_at)
+                SELECT 'task ' || n, 'seeded', n, n * 65536, n % 3 = 0, :user_id,
+                       now(), now()
+                FROM generate_series(1, :tasks) AS n
+                RETURNING id
+                """
+            ),
+            {"user_id": user_id, "tasks": SEED_TASKS},
+        )
+        return user_id, sorted(res.scalars())
+
+
+async def cleanup() -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "DELETE FROM tasks WHERE user_id IN "
+                "(SELECT id FROM users WHERE email = :email)"
+            ),
+            {"email": SEED_EMAIL},
+        )
+        await conn.execute(
+            text("DELETE FROM users WHERE email = :email"), {"email": SEED_EMAIL}
+        )
+
+
+class RebuiltTaskRepository(TaskRepository):
+    """Прежние реализации: конструкция строится заново на каждый вызов."""
+
+    async def find_one_by_id(self, task_id: int, user_id: int):
+        async with self._read_session(user_id) as session:
+            stmt = select(self.model).where(
+                self.model.id == task_id, self.model.user_id == user_id
+            )
+            result = await session.execute(stmt)
+            task = result.scalar_one_or_none()
+            if task is None:
+                raise TaskNotExist()
+            return task
+
+    async def find_by_status_and_priority(
+        self,
+        user_id: int,
+        is_completed: bool | None = None,
+        priority: int | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        as_rows: bool = False,
+    ):
+        async with self._read_session(user_id) as session:
+            stmt = (
+                select(*self.row_columns, self.model.rank)
+                if as_rows
+                else select(self.model)
+            )
+            stmt = stmt.where(self.model.user_id == user_id)
+            if is_completed is not None:
+                stmt = stmt.where(self.model.is_completed.is_(is_completed))
+            if priority is not None:
+                stmt = stmt.where(self.model.priority == priority)
+            stmt = stmt.order_by(self.model.rank.asc(), self.model.id.asc())
+            if cursor is not None:
+                stmt = stmt.where(
+                    tuple_(self.model.rank, self.model.id)
+                    > tuple_(*decode_cursor(cursor, 2))
+                )
+            result = await session.execute(stmt.limit(limit + 1))
+            items = result.all() if as_rows else result.scalars()
+            return split_page(items, limit, lambda task: (task.rank, task.id))
+
+    async def _update_counted(
+        self, session, values: dict, task_id: int, user_id: int | None = None
+    ):
+        criteria = [self.model.id == task_id]
+        if user_id is not None:
+            criteria.append(self.model.user_id == user_id)
+        old = (
+            select(self.model.id, self.model.priority, self.model.is_completed)
+            .where(*criteria)
+            .with_for_update()
+            .subquery("old")
+        )
+        res = await session.execute(
+            update(self.model)
+            .where(self.model.id == old.c.id)
+            .values(**values)
+            .returning(self.model, old.c.priority, old.c.is_completed)
+        )
+        row = res.one_or_none()
+        if row is None:
+            return None
+        task, old_priority, old_completed = row
+        deltas: dict = {}
+        self._count(deltas, old_priority, old_completed, -1)
+        self._count(deltas, task.priority, task.is_completed, 1)
+        await self._apply_stats(session, task.user_id, deltas)
+        return task
+
+
+class RebuiltUserRepository(UserRepository):
+    async def find_by_email(self, email: str) -> User | None:
+        stmt = select(self.model).where(self.model.email == email)
+        async with self._read_session() as session:
+            result = await session.execute(stmt)
+            return result.scalar_one_or_none()
+
+
+async def measure(call, calls: int) -> float:
+    """Процессорное время на вызов, мкс."""
+    started = time.process_time()
+    for n in range(calls):
+        await call(n)
+    return (time.process_time() - started) / calls * 1e6
+
+
+async def main(calls: int, rounds: int) -> None:
+    await cleanup()
+    user_id, task_ids = await seed()
+    cursor = encode_cursor(65536 * 3, task_ids[2])
+    try:
+        # Одна транзакция на весь прогон; изменения update_one откатываются
+        async with async_session_maker() as session:
+            implementations = {
+                "rebuilt": (RebuiltUserRepository(session), RebuiltTaskRepository(session)),
+                "cached": (UserRepository(session), TaskRepository(session)),
+            }
+
+            def cases(users, tasks):
+                def pick(n: int) -> int:
+                    return task_ids[n % len(task_ids)]
+
+                return {
+                    "find_by_email": lambda n: users.find_by_email(SEED_EMAIL),
+                    "find_one_by_id": lambda n: tasks.find_one_by_id(pick(n), user_id),
+                    "find_by_status_and_priority": lambda n: tasks.find_by_status_and_priority(
+                        user_id, is_completed=False, limit=PAGE_SIZE, cursor=cursor
+                    ),
+                    "update_one": lambda n: tasks.update_one(
+                        pick(n), {"title": f"t{n}"}, user_id
+                    ),
+                }
+
+            calls_by_impl = {
+                name: cases(*repos) for name, repos in implementations.items()
+            }
+            print(
+                f"prepared_statement_cache_size={DB_PREPARED_STATEMENT_CACHE_SIZE}, "
+                f"{calls} calls x {rounds} rounds, median CPU us/call"
+            )
+            print(f"{'query':<28} {'rebuilt':>9} {'cached':>9} {'saved':>7}")
+            for query in calls_by_impl["cached"]:
+                samples: dict[str, list[float]] = {name: [] for name in calls_by_impl}
+                # Прогрев кэшей компиляции и подготовленных выражений
+                for name in calls_by_impl:
+                    await measure(calls_by_impl[name][query], 50)
+                # Реализации чередуются, чтобы фоновый шум делился поровну
+                for _ in range(rounds):
+                    for name in calls_by_impl:
+                        samples[name].append(
+                            await measure(calls_by_impl[name][query], calls)
+                        )
+                before = statistics.median(samples["rebuilt"])
+                after = statistics.median(samples["cached"])
+                print(
+                    f"{query:<28} {before:>9.1f} {after:>9.1f}"
+                    f" {(1 - after / before) * 100:>6.0f}%"
+                )
+            await session.rollback()
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.rounds))
@@ -9,7 +9,8 @@ from logging.config import fileConfig
 from src.common.config import DB_HOST, DB_PORT, DB_USER, DB_NAME, DB_PASS
 from src.common.database import Base
 from src.user.models import User
-from src.task.models import Task
+from src.task.models import Task, TaskArchive
+from src.common.rate_limit import RateLimitBucket
 
 
 config = context.config
@@ -21,7 +22,10 @@ config.set_section_option(section, "DB_USER", DB_USER)
 config.set_section_option(section, "DB_NAME", DB_NAME)
 config.set_section_option(section, "DB_PASS", DB_PASS)
 
-if config.config_file_name is not None:
+# При запуске из приложения (run_migrations) логирование уже настроено
+if config.config_file_name is not None and config.attributes.get(
+    "configure_logger", True
+):
     fileConfig(config.config_file_name)
 
 target_metadata = Base.metadata
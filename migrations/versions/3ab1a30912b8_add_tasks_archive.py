@@ -0,0 +1,43 @@
+"""add tasks archive
+
+Revision ID: 3ab1a30912b8
+Revises: 9595a870332a
+Create Date: 2026-10-18 19:12:40.361204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3ab1a30912b8'
+down_revision: Union[str, None] = '9595a870332a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('tasks_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(length=256), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.BigInteger(), nullable=False),
+    sa.Column('is_completed', sa.Boolean(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tasks_archive_user_id_archived_at_id', 'tasks_archive', ['user_id', 'archived_at', 'id'], unique=False)
+    op.create_index('ix_tasks_updated_at_completed', 'tasks', ['updated_at'], unique=False, postgresql_where=sa.text('is_completed'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_updated_at_completed', table_name='tasks', postgresql_where=sa.text('is_completed'))
+    op.drop_index('ix_tasks_archive_user_id_archived_at_id', table_name='tasks_archive')
+    op.drop_table('tasks_archive')
@@ -0,0 +1,58 @@
+"""add task stats
+
+Revision ID: 43d4da3a4d34
+Revises: 4a124f21128f
+Create Date: 2026-10-18 17:11:05.402817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '43d4da3a4d34'
+down_revision: Union[str, None] = '4a124f21128f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('task_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('task_priority_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'priority')
+    )
+    # Начальное заполнение по существующим задачам
+    op.execute(
+        """
+        INSERT INTO task_stats (user_id, total, completed)
+        SELECT user_id, count(*), count(*) FILTER (WHERE is_completed)
+        FROM tasks
+        GROUP BY user_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO task_priority_stats (user_id, priority, total, completed)
+        SELECT user_id, priority, count(*), count(*) FILTER (WHERE is_completed)
+        FROM tasks
+        GROUP BY user_id, priority
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('task_priority_stats')
+    op.drop_table('task_stats')
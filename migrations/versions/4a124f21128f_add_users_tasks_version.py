@@ -0,0 +1,26 @@
+"""add users tasks version
+
+Revision ID: 4a124f21128f
+Revises: e17b4f62c0a8
+Create Date: 2026-10-18 16:02:41.583306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a124f21128f'
+down_revision: Union[str, None] = 'e17b4f62c0a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('tasks_version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'tasks_version')
@@ -0,0 +1,38 @@
+"""add tasks access path indexes
+
+Revision ID: 5e2d8b60a1f3
+Revises: c3f1a9d27e4b
+Create Date: 2026-10-18 13:02:11.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2d8b60a1f3'
+down_revision: Union[str, None] = 'c3f1a9d27e4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (user_id, priority, id) покрывает фильтр по user_id, сортировку
+    # списка и keyset-курсор, поэтому заменяет индекс (user_id, priority)
+    op.create_index('ix_tasks_user_id_priority_id', 'tasks', ['user_id', 'priority', 'id'], unique=False)
+    op.create_index(
+        'ix_tasks_user_id_priority_id_incomplete',
+        'tasks',
+        ['user_id', 'priority', 'id'],
+        unique=False,
+        postgresql_where=sa.text('NOT is_completed'),
+    )
+    op.drop_index('ix_tasks_user_id_priority', table_name='tasks')
+
+
+def downgrade() -> None:
+    op.create_index('ix_tasks_user_id_priority', 'tasks', ['user_id', 'priority'], unique=False)
+    op.drop_index('ix_tasks_user_id_priority_id_incomplete', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_priority_id', table_name='tasks')
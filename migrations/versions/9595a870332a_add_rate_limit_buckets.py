@@ -0,0 +1,32 @@
+"""add rate limit buckets
+
+Revision ID: 9595a870332a
+Revises: 43d4da3a4d34
+Create Date: 2026-10-18 18:04:27.915536
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9595a870332a'
+down_revision: Union[str, None] = '43d4da3a4d34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('rate_limit_buckets',
+    sa.Column('key', sa.String(length=320), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key'),
+    prefixes=['UNLOGGED']
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,60 @@
+"""add tasks rank
+
+Revision ID: a84c0e3b9d12
+Revises: 5e2d8b60a1f3
+Create Date: 2026-10-18 14:21:37.660954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a84c0e3b9d12'
+down_revision: Union[str, None] = '5e2d8b60a1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RANK_GAP = 1 << 16
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('rank', sa.BigInteger(), nullable=True))
+    # Начальный порядок совпадает с прежним порядком списка (priority, id)
+    op.execute(
+        f"""
+        UPDATE tasks AS t
+        SET rank = ranked.position * {RANK_GAP}
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY priority, id) AS position
+            FROM tasks
+        ) AS ranked
+        WHERE t.id = ranked.id
+        """
+    )
+    op.alter_column('tasks', 'rank', nullable=False)
+    op.create_index('ix_tasks_user_id_rank_id', 'tasks', ['user_id', 'rank', 'id'], unique=False)
+    op.create_index(
+        'ix_tasks_user_id_rank_id_incomplete',
+        'tasks',
+        ['user_id', 'rank', 'id'],
+        unique=False,
+        postgresql_where=sa.text('NOT is_completed'),
+    )
+    # Список больше не сортируется по priority
+    op.drop_index('ix_tasks_user_id_priority_id_incomplete', table_name='tasks')
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_tasks_user_id_priority_id_incomplete',
+        'tasks',
+        ['user_id', 'priority', 'id'],
+        unique=False,
+        postgresql_where=sa.text('NOT is_completed'),
+    )
+    op.drop_index('ix_tasks_user_id_rank_id_incomplete', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_rank_id', table_name='tasks')
+    op.drop_column('tasks', 'rank')
@@ -0,0 +1,26 @@
+"""add tasks user_id priority index
+
+Revision ID: c3f1a9d27e4b
+Revises: 86b9c7115f51
+Create Date: 2026-10-18 12:10:42.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1a9d27e4b'
+down_revision: Union[str, None] = '86b9c7115f51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_user_id_priority', 'tasks', ['user_id', 'priority'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_user_id_priority', table_name='tasks')
@@ -0,0 +1,42 @@
+"""add tasks search vector
+
+Revision ID: e17b4f62c0a8
+Revises: a84c0e3b9d12
+Create Date: 2026-10-18 15:08:53.117420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e17b4f62c0a8'
+down_revision: Union[str, None] = 'a84c0e3b9d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        'tasks',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index('ix_tasks_search_vector', 'tasks', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_search_vector', table_name='tasks', postgresql_using='gin')
+    op.drop_column('tasks', 'search_vector')
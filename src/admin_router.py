@@ -1,12 +1,24 @@
 # src/admin/router.py
 import logging
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated, Literal
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from src.common import jwt_auth
+from src.common.config import FAST_JSON_RESPONSES
+from src.common.export import EXPORT_MEDIA_TYPES
+from src.common.fast_json import rows_page_response
+from src.common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
+from src.common.pomodoro_client import PomodoroClient, pomodoro_client
 from src.task.schemas import GetTaskSchema
 from src.task.dependencies import task_service
-from src.task.service import TaskService
+from src.task.service import (
+    TaskService,
+    archive_completed_tasks,
+    rebuild_task_stats,
+)
 from src.user.schemas import GetUserSchema
+from src.user.cache import user_cache
 from src.user.dependencies import user_service
 from src.user.service import UserService
 
@@ -17,15 +29,64 @@ admin_router = APIRouter(
 )
 
 
-@admin_router.get("/tasks", response_model=list[GetTaskSchema])
-async def get_all_tasks(service: Annotated[TaskService, Depends(task_service)]):
+@admin_router.get("/tasks", response_model=Page[GetTaskSchema])
+async def get_all_tasks(
+    service: Annotated[TaskService, Depends(task_service)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+):
     try:
-        return await service.get_all_tasks()
+        page = await service.get_all_tasks(limit, cursor, FAST_JSON_RESPONSES)
+        if FAST_JSON_RESPONSES:
+            return rows_page_response(page, service.task_repository.row_columns)
+        return page
     except Exception as e:
         logging.exception(f"Error getting all tasks: {e}")
         raise HTTPException(status_code=400, detail="Error getting all tasks")
 
 
+@admin_router.get(
+    "/export/tasks",
+    response_class=StreamingResponse,
+    dependencies=[Depends(jwt_auth.get_current_admin)],
+)
+async def export_tasks(
+    service: Annotated[TaskService, Depends(task_service)],
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+    user_id: int | None = None,
+    is_completed: bool | None = None,
+):
+    """
+    Потоковая выгрузка задач (NDJSON или CSV) серверным курсором:
+    память не растёт с размером таблицы, первый байт уходит сразу.
+    """
+    return StreamingResponse(
+        service.export_tasks(export_format, user_id, is_completed),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="tasks.{export_format}"'
+        },
+    )
+
+
+@admin_router.get(
+    "/export/users",
+    response_class=StreamingResponse,
+    dependencies=[Depends(jwt_auth.get_current_admin)],
+)
+async def export_users(
+    service: Annotated[UserService, Depends(user_service)],
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+):
+    return StreamingResponse(
+        service.export_users(export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="users.{export_format}"'
+        },
+    )
+
+
 @admin_router.patch("/tasks/{task_id}/complete", response_model=GetTaskSchema)
 async def admin_mark_task_completed(
     task_id: int, service: Annotated[TaskService, Depends(task_service)]
@@ -37,16 +98,71 @@ async def admin_mark_task_completed(
         raise HTTPException(status_code=400, detail="Error marking task as completed")
 
 
-@admin_router.get("/task/{user_id}", response_model=list[GetTaskSchema])
+@admin_router.get("/task/{user_id}", response_model=Page[GetTaskSchema])
 async def get_tasks_by_user(
     user_id: int,
     service: Annotated[TaskService, Depends(task_service)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
 ):
     """
     Получить все задачи конкретного пользователя по его user_id (без авторизации).
     """
     try:
-        return await service.get_tasks(user_id)
+        page = await service.get_tasks(
+            user_id, limit=limit, cursor=cursor, as_rows=FAST_JSON_RESPONSES
+        )
+        if FAST_JSON_RESPONSES:
+            return rows_page_response(page, service.task_repository.row_columns)
+        return page
     except Exception as e:
         logging.exception(f"Error getting tasks by user {user_id}: {e}")
         raise HTTPException(status_code=400, detail="Error getting user tasks")
+
+
+@admin_router.get("/cache/users", dependencies=[Depends(jwt_auth.get_current_admin)])
+async def get_user_cache_stats():
+    """Счётчики кэша авторизованных пользователей (для подбора размера/TTL)."""
+    return user_cache.stats()
+
+
+@admin_router.get(
+    "/cache/pomodoro", dependencies=[Depends(jwt_auth.get_current_admin)]
+)
+async def get_pomodoro_cache_stats(
+    client: Annotated[PomodoroClient, Depends(pomodoro_client)],
+):
+    """
+    Счётчики кэша чтений pomodoro: попадания, устаревшие, объединённые.
+    Пока pomodoro_router не подключён (см. src/requests_to_second_back.py),
+    кэш не используется и счётчики остаются нулевыми.
+    """
+    return client.cache.stats()
+
+
+@admin_router.post(
+    "/tasks/stats/rebuild", dependencies=[Depends(jwt_auth.get_current_admin)]
+)
+async def rebuild_stats(background_tasks: BackgroundTasks, user_id: int | None = None):
+    """
+    Пересчёт счётчиков статистики задач: для одного пользователя — сразу,
+    для всех — в фоне.
+    """
+    if user_id is not None:
+        try:
+            await rebuild_task_stats(user_id)
+        except Exception as e:
+            logging.exception(f"Error rebuilding task stats for user {user_id}: {e}")
+            raise HTTPException(status_code=400, detail="Error rebuilding task stats")
+        return {"message": "Task stats rebuilt"}
+    background_tasks.add_task(rebuild_task_stats)
+    return {"message": "Task stats rebuild started"}
+
+
+@admin_router.post(
+    "/tasks/archive/run", dependencies=[Depends(jwt_auth.get_current_admin)]
+)
+async def run_archive(background_tasks: BackgroundTasks):
+    """Внеочередной перенос старых завершённых задач в архив (в фоне)."""
+    background_tasks.add_task(archive_completed_tasks)
+    return {"message": "Task archiving started"}
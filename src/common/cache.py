@@ -0,0 +1,200 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, Hashable, TypeVar
+
+from loguru import logger
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Ограниченный по размеру LRU-кэш с временем жизни записей.
+    Рассчитан на использование из одного event loop, без блокировок.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Счётчик инвалидаций: запись, прочитанная из БД до инвалидации,
+        # не должна попасть в кэш после неё
+        self.generation = 0
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> V | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._discard(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, generation: int | None = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        if key in self._data:
+            self._discard(key)
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._on_set(key, value)
+        while len(self._data) > self.max_size:
+            self._discard(next(iter(self._data)))
+
+    def invalidate(self, key: Hashable) -> None:
+        self.generation += 1
+        if key in self._data:
+            self._discard(key)
+
+    def clear(self) -> None:
+        self.generation += 1
+        for key in list(self._data):
+            self._discard(key)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _discard(self, key: Hashable) -> None:
+        _, value = self._data.pop(key)
+        self._on_discard(key, value)
+
+    def _on_set(self, key: Hashable, value: V) -> None:
+        pass
+
+    def _on_discard(self, key: Hashable, value: V) -> None:
+        pass
+
+
+class SingleFlightCache(Generic[V]):
+    """
+    Кэш результатов асинхронной загрузки (например, ответов внешнего
+    сервиса) с объединением запросов и stale-while-revalidate:
+
+    - свежая запись (моложе ttl) отдаётся сразу;
+    - устаревшая, но моложе ttl + stale_ttl, тоже отдаётся сразу, а в фоне
+      запускается одно обновление; его ошибка только логируется, и до конца
+      stale_ttl продолжает отдаваться последнее удачное значение;
+    - без записи все одновременные вызовы ждут одну и ту же загрузку.
+
+    Ошибки загрузки не кэшируются. invalidate забывает запись и текущую
+    загрузку: результат начатой до инвалидации загрузки в кэш не попадёт.
+    Рассчитан на использование из одного event loop.
+    """
+
+    def __init__(self, max_size: int, ttl: float, stale_ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[V]]) -> V:
+        entry = self._data.get(key)
+        if entry is not None:
+            fetched_at, value = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._load(key, load, background=True)
+                return value
+            del self._data[key]
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._load(key, load)
+        else:
+            self.coalesced += 1
+        # Отмена одного ожидающего (клиент ушёл) не отменяет общую загрузку
+        return await asyncio.shield(task)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._inflight.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+    def _load(
+        self, key: Hashable, load: Callable[[], Awaitable[V]], background: bool = False
+    ) -> asyncio.Task:
+        async def run() -> V:
+            try:
+                value = await load()
+            finally:
+                current = self._inflight.get(key) is task
+                if current:
+                    del self._inflight[key]
+            if current:
+                self._store(key, value)
+            return value
+
+        task = asyncio.create_task(run())
+        task.add_done_callback(
+            self._log_refresh_error if background else self._consume_error
+        )
+        self._inflight[key] = task
+        return task
+
+    def _store(self, key: Hashable, value: V) -> None:
+        self._data.pop(key, None)
+        self._data[key] = (time.monotonic(), value)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    @staticmethod
+    def _consume_error(task: asyncio.Task) -> None:
+        # Ошибку получают ожидающие; если все они отменены, asyncio не
+        # должен ругаться на необработанное исключение задачи
+        if not task.cancelled():
+            task.exception()
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background cache refresh failed: {task.exception()!r}")
@@ -14,5 +14,124 @@ HMAC_DIGEST_MODE = "sha256"
 JWT_SIGN_ALGORITHM = "HS256"
 TOKEN_SECRET_KEY = os.getenv("TOKEN_SECRET_KEY", "mysecretkey")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 12 * 60))
+# Email администраторов через запятую: только им доступны служебные
+# маршруты /admin (выгрузки, пересчёты, архив). Пусто — доступа нет ни у кого
+ADMIN_EMAILS = frozenset(
+    email.strip().lower()
+    for email in os.getenv("ADMIN_EMAILS", "").split(",")
+    if email.strip()
+)
 
 MAIL_PASSWORD_APP = os.environ.get("MAIL_PASSWORD_APP")
+
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 10_000))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+
+POMODORO_BACKEND_URL = os.getenv(
+    "POMODORO_BACKEND_URL", "http://212.41.30.156:7000/pomodoro"
+)
+POMODORO_CONNECT_TIMEOUT = float(os.getenv("POMODORO_CONNECT_TIMEOUT", 2))
+POMODORO_READ_TIMEOUT = float(os.getenv("POMODORO_READ_TIMEOUT", 5))
+POMODORO_MAX_CONNECTIONS = int(os.getenv("POMODORO_MAX_CONNECTIONS", 50))
+POMODORO_MAX_RETRIES = int(os.getenv("POMODORO_MAX_RETRIES", 2))
+POMODORO_RETRY_BACKOFF = float(os.getenv("POMODORO_RETRY_BACKOFF", 0.2))
+POMODORO_BREAKER_FAILURES = int(os.getenv("POMODORO_BREAKER_FAILURES", 5))
+POMODORO_BREAKER_RESET_SECONDS = float(os.getenv("POMODORO_BREAKER_RESET_SECONDS", 30))
+# Кэш чтений pomodoro по пользователю: TTL свежести и сколько ещё секунд
+# после него отдавать последнее значение, пока оно обновляется в фоне
+POMODORO_CACHE_MAX_SIZE = int(os.getenv("POMODORO_CACHE_MAX_SIZE", 10_000))
+POMODORO_CACHE_TTL_SECONDS = float(os.getenv("POMODORO_CACHE_TTL_SECONDS", 5))
+POMODORO_CACHE_STALE_SECONDS = float(os.getenv("POMODORO_CACHE_STALE_SECONDS", 60))
+
+# SMTP-сервер для исходящей почты. Для локальной отладки подходит любой
+# SMTP-приёмник, например: SMTP_HOST=localhost SMTP_PORT=1025
+# SMTP_START_TLS=false SMTP_USERNAME=
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "matvey.sherbaev@gmail.com")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", MAIL_PASSWORD_APP)
+SMTP_FROM = os.getenv("SMTP_FROM", SMTP_USERNAME or "noreply@localhost")
+SMTP_START_TLS = os.getenv("SMTP_START_TLS", "true").lower() in ("1", "true", "yes")
+SMTP_VALIDATE_CERTS = os.getenv("SMTP_VALIDATE_CERTS", "false").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 10))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", 30))
+MAIL_QUEUE_SIZE = int(os.getenv("MAIL_QUEUE_SIZE", 1000))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", 50))
+MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", 5))
+MAIL_RETRY_BACKOFF = float(os.getenv("MAIL_RETRY_BACKOFF", 1))
+
+# Списки отдаются orjson напрямую из строк выборки, минуя pydantic
+# (см. src/common/fast_json.py)
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+# Ограничение частоты логина/регистрации (token bucket): BURST попыток
+# подряд, затем PER_MINUTE в минуту. Бэкенд: memory (в процессе) или
+# postgres (общий для всех воркеров)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", 20))
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", 10))
+RATE_LIMIT_EMAIL_BURST = float(os.getenv("RATE_LIMIT_EMAIL_BURST", 5))
+RATE_LIMIT_EMAIL_PER_MINUTE = float(os.getenv("RATE_LIMIT_EMAIL_PER_MINUTE", 1))
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", 16))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100_000))
+# Брать IP из X-Forwarded-For (только за доверенным reverse proxy)
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+
+# Реплики только для чтения: "host[:port],host[:port]" с теми же
+# DB_NAME/DB_USER/DB_PASS. Пусто — все запросы идут в основную БД
+DB_REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", 20))
+# Сколько секунд после своей записи пользователь читает из основной БД
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", 5))
+# Реплика с отставанием больше этого считается нездоровой (0 — не проверять)
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 10))
+
+# Живые обновления задач (SSE): memory — только подписчики этого процесса,
+# postgres — доставка между воркерами через LISTEN/NOTIFY
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "task_events")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 100))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+# Переподключение LISTEN: экспоненциальная задержка с джиттером от
+# EVENTS_RECONNECT_BACKOFF секунд, не больше EVENTS_RECONNECT_MAX_DELAY
+EVENTS_RECONNECT_BACKOFF = float(os.getenv("EVENTS_RECONNECT_BACKOFF", 1))
+EVENTS_RECONNECT_MAX_DELAY = float(os.getenv("EVENTS_RECONNECT_MAX_DELAY", 30))
+
+# Архив завершённых задач: периодическая задача переносит задачи,
+# завершённые больше ARCHIVE_AFTER_DAYS дней назад, в tasks_archive пачками
+# по ARCHIVE_BATCH_SIZE, не больше ARCHIVE_MAX_BATCHES пачек за запуск.
+# Выключено по умолчанию: задачи уходят из tasks, поэтому включается явно
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "false").lower() in ("1", "true", "yes")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 30))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 1000))
+ARCHIVE_MAX_BATCHES = int(os.getenv("ARCHIVE_MAX_BATCHES", 100))
+ARCHIVE_INTERVAL_MINUTES = float(os.getenv("ARCHIVE_INTERVAL_MINUTES", 60))
+
+# Режим отладки: заголовок Server-Timing с SQL-профилем на каждом ответе
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+# Профилирование SQL (см. src/common/sql_profiling.py): доля запросов,
+# для которых считаются запросы к БД и ищется N+1; порог медленного лога
+# в мс (0 — выключен) и сколько повторов одной формы запроса считать N+1
+SQL_PROFILE_SAMPLE_RATE = float(os.getenv("SQL_PROFILE_SAMPLE_RATE", 0.01))
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", 200))
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 10))
+
+# Стартовая фаза воркера: ожидание БД, миграции в процессе (под
+# advisory-блокировкой) и число заранее открытых соединений пула.
+# Миграции при старте выключены по умолчанию: схема по-прежнему
+# обновляется через alembic upgrade head, MIGRATE_ON_STARTUP=true — по желанию
+DB_STARTUP_RETRIES = int(os.getenv("DB_STARTUP_RETRIES", 10))
+DB_STARTUP_RETRY_DELAY = float(os.getenv("DB_STARTUP_RETRY_DELAY", 2))
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", 10))
+# Сколько секунд /health/ready ждёт ответа БД
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", 2))
+
+# Кэш подготовленных выражений asyncpg на соединение (по умолчанию у
+# SQLAlchemy 100): горячие запросы не готовятся заново на сервере.
+# 0 — выключить (нужно за pgbouncer в режиме transaction)
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", 500))
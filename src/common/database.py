@@ -1,31 +1,217 @@
 import asyncio
-import subprocess
+import time
 from contextlib import asynccontextmanager
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable
+from pathlib import Path
 from loguru import logger
 
 import asyncpg
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from src.common.config import DB_HOST, DB_NAME, DB_PASS, DB_PORT, DB_USER
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from src.common.cache import TTLCache
+from src.common.config import (
+    DB_HOST,
+    DB_NAME,
+    DB_PASS,
+    DB_POOL_PREWARM,
+    DB_PREPARED_STATEMENT_CACHE_SIZE,
+    DB_PORT,
+    DB_REPLICA_HOSTS,
+    DB_REPLICA_POOL_SIZE,
+    DB_STARTUP_RETRIES,
+    DB_STARTUP_RETRY_DELAY,
+    DB_USER,
+    HEALTH_DB_TIMEOUT,
+    MIGRATE_ON_STARTUP,
+    REPLICA_HEALTH_INTERVAL,
+    REPLICA_MAX_LAG_SECONDS,
+    REPLICA_STICKY_SECONDS,
+    USER_CACHE_MAX_SIZE,
+)
+from src.common.metrics import db_pool_checkout_seconds, registry
+from src.common.sql_profiling import instrument
 
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 Base = declarative_base()
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, замеряющий ожидание свободного соединения (включая его открытие)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_seconds.observe(time.perf_counter() - started)
 
 
 engine = create_async_engine(
     DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
     pool_size=30,
     max_overflow=25,
     echo=False,
     pool_timeout=30,
     pool_recycle=1800,
-    pool_pre_ping=True
+    pool_pre_ping=True,
+    connect_args={"prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE},
 )
+instrument(engine)
 
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+registry.gauge("db_pool_size", "Configured DB pool size", lambda: engine.pool.size())
+registry.gauge(
+    "db_pool_checked_out", "DB connections in use", lambda: engine.pool.checkedout()
+)
+registry.gauge(
+    "db_pool_overflow",
+    "DB connections opened beyond pool_size (negative: unused pool slots)",
+    lambda: engine.pool.overflow(),
+)
+
+
+# Отставание реплики; 0, если всё полученное WAL уже применено
+# (на простаивающем мастере pg_last_xact_replay_timestamp стареет без отставания)
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReplicaSet:
+    """
+    Реплики для чтения: свой engine и пул на каждую, выбор по кругу среди
+    здоровых. Фоновая проверка раз в health_interval секунд помечает
+    реплику нездоровой, если она недоступна или отстаёт больше max_lag;
+    ошибка подключения при чтении помечает её сразу. Пользователь, который
+    только что записал, sticky_seconds читает из основной БД
+    (read-your-writes).
+    """
+
+    def __init__(
+        self,
+        hosts: list[str],
+        pool_size: int = DB_REPLICA_POOL_SIZE,
+        sticky_seconds: float = REPLICA_STICKY_SECONDS,
+        health_interval: float = REPLICA_HEALTH_INTERVAL,
+        max_lag: float = REPLICA_MAX_LAG_SECONDS,
+    ):
+        self.hosts = hosts
+        self.health_interval = health_interval
+        self.max_lag = max_lag
+        self.engines: list[AsyncEngine] = [
+            create_async_engine(
+                f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{host}/{DB_NAME}",
+                pool_size=pool_size,
+                max_overflow=pool_size,
+                pool_timeout=5,
+                pool_recycle=1800,
+                pool_pre_ping=True,
+                connect_args={
+                    "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE
+                },
+            )
+            for host in hosts
+        ]
+        for replica_engine in self.engines:
+            instrument(replica_engine)
+        self.session_makers = [
+            sessionmaker(e, class_=AsyncSession, expire_on_commit=False)
+            for e in self.engines
+        ]
+        self.healthy = [True] * len(self.engines)
+        self._next = 0
+        self._sticky: TTLCache[bool] = TTLCache(USER_CACHE_MAX_SIZE, sticky_seconds)
+        self._health_task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def stick(self, user_id: int) -> None:
+        self._sticky.set(user_id, True)
+
+    def is_sticky(self, user_id: int | None) -> bool:
+        return user_id is not None and self._sticky.get(user_id) is not None
+
+    def choose(self) -> int | None:
+        """Индекс следующей здоровой реплики по кругу или None."""
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            if self.healthy[index]:
+                return index
+        return None
+
+    def mark_unhealthy(self, index: int, reason) -> None:
+        if self.healthy[index]:
+            logger.warning(f"Replica {self.hosts[index]} marked unhealthy: {reason}")
+        self.healthy[index] = False
+
+    async def check(self, index: int) -> None:
+        try:
+            async with self.engines[index].connect() as conn:
+                lag = await asyncio.wait_for(
+                    conn.scalar(REPLICA_LAG_QUERY), self.health_interval
+                )
+        except (DBAPIError, OSError, asyncio.TimeoutError) as e:
+            self.mark_unhealthy(index, e)
+            return
+        if self.max_lag and lag > self.max_lag:
+            self.mark_unhealthy(index, f"lag {lag:.1f}s")
+            return
+        if not self.healthy[index]:
+            logger.info(f"Replica {self.hosts[index]} is healthy again")
+        self.healthy[index] = True
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.gather(*(self.check(i) for i in range(len(self.engines))))
+            await asyncio.sleep(self.health_interval)
+
+    def start(self) -> None:
+        if self.enabled:
+            self._health_task = asyncio.create_task(
+                self._health_loop(), name="replica-health"
+            )
+
+    async def stop(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for e in self.engines:
+            await e.dispose()
+
+
+replicas = ReplicaSet(DB_REPLICA_HOSTS)
+registry.gauge(
+    "db_replicas_healthy", "Read replicas currently used for reads", lambda: sum(replicas.healthy)
+)
+
+
+def note_write(session: AsyncSession | None, user_id: int) -> None:
+    """
+    Отмечает запись данных пользователя: до конца транзакции чтения этой
+    сессии идут в неё же, после коммита пользователь на время
+    прилипает к основной БД.
+    """
+    if session is not None:
+        session.info["wrote"] = True
+    if replicas.enabled:
+        run_after_commit(session, lambda: replicas.stick(user_id))
+
 
 @asynccontextmanager
 async def get_async_session() -> AsyncSession:
@@ -33,10 +219,38 @@ async def get_async_session() -> AsyncSession:
         yield session
 
 
-async def wait_for_db():
-    """Ожидаем доступности базы данных перед запуском сервиса."""
-    retries = 10
-    while retries:
+async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Unit of work на HTTP-запрос: одна сессия и одна транзакция, общие для
+    всех репозиториев запроса. Коммит при успешном завершении обработчика,
+    откат при любом исключении. Соединение берётся из пула при первом
+    запросе к БД, поэтому ответы из кэша пул не трогают.
+    """
+    async with async_session_maker() as session:
+        async with session.begin():
+            yield session
+
+
+def run_after_commit(session: AsyncSession | None, callback: Callable[[], None]):
+    """
+    Выполняет callback после коммита транзакции сессии запроса; без общей
+    сессии (репозиторий сам коммитит) — сразу. При откате callback теряется
+    вместе с сессией.
+    """
+    if session is None:
+        callback()
+        return
+    event.listen(session.sync_session, "after_commit", lambda _: callback(), once=True)
+
+
+async def wait_for_db(
+    retries: int = DB_STARTUP_RETRIES, delay: float = DB_STARTUP_RETRY_DELAY
+) -> None:
+    """
+    Ожидаем доступности базы данных перед запуском сервиса. Если база так
+    и не ответила — исключение: lifespan прерывается и воркер не стартует.
+    """
+    for attempt in range(retries, 0, -1):
         try:
             conn = await asyncpg.connect(
                 user=DB_USER,
@@ -48,18 +262,101 @@ async def wait_for_db():
             await conn.close()
             logger.info("Database is ready.")
             return
-        except Exception as e:
+        except (OSError, asyncpg.PostgresError) as e:
             logger.warning(
-                f"Database not ready, retrying... {retries} attempts left. Error: {e}"
+                f"Database not ready, retrying... {attempt - 1} attempts left. Error: {e}"
             )
-            retries -= 1
-            await asyncio.sleep(2)
-    logger.error("Database is not available, exiting.")
-    exit(1)
+            if attempt > 1:
+                await asyncio.sleep(delay)
+    raise ConnectionError("Database is not available")
+
+
+# Ключ advisory-блокировки миграций. Пара int4 — другое пространство
+# ключей, чем pg_advisory_xact_lock(user_id) в TaskRepository
+MIGRATIONS_LOCK_KEY = (0x7461736B, 1)
+
+
+def _upgrade_head() -> None:
+    config = AlembicConfig(str(PROJECT_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "migrations"))
+    # Логирование уже настроено приложением, fileConfig его бы сбросил
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
 
 
 async def run_migrations():
-    """Запускаем Alembic миграции."""
+    """
+    Запускаем Alembic миграции в процессе. Воркеры стартуют одновременно,
+    поэтому миграции выполняются под сессионной advisory-блокировкой:
+    первый воркер накатывает их, остальные ждут и видят, что всё уже
+    применено. env.py вызывает asyncio.run, поэтому Alembic работает в
+    отдельном потоке со своим event loop.
+    """
     logger.info("Running database migrations...")
-    subprocess.run("alembic upgrade head", shell=True, check=True)
-    logger.info("Migrations completed.")
\ No newline at end of file
+    async with engine.connect() as conn:
+        await conn.execute(
+            text("SELECT pg_advisory_lock(:classid, :objid)"),
+            dict(zip(("classid", "objid"), MIGRATIONS_LOCK_KEY)),
+        )
+        await conn.commit()
+        try:
+            await asyncio.to_thread(_upgrade_head)
+        finally:
+            await conn.execute(
+                text("SELECT pg_advisory_unlock(:classid, :objid)"),
+                dict(zip(("classid", "objid"), MIGRATIONS_LOCK_KEY)),
+            )
+            await conn.commit()
+    logger.info("Migrations completed.")
+
+
+async def prewarm_pool(size: int = DB_POOL_PREWARM) -> None:
+    """
+    Открывает size соединений пула заранее (не больше pool_size), чтобы
+    первые запросы после старта не ждали установления соединений.
+    """
+    size = min(size, engine.pool.size())
+    if size <= 0:
+        return
+
+    async def open_connection():
+        conn = await engine.connect()
+        try:
+            await conn.execute(text("SELECT 1"))
+        except BaseException:
+            await conn.close()
+            raise
+        return conn
+
+    # Ошибка одного соединения не должна оставить остальные открытыми:
+    # дожидаемся всех, возвращаем в пул открытые и только потом падаем
+    results = await asyncio.gather(
+        *(open_connection() for _ in range(size)), return_exceptions=True
+    )
+    for result in results:
+        if not isinstance(result, BaseException):
+            await result.close()
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    logger.info(f"Database pool prewarmed with {size} connections")
+
+
+async def prepare_database() -> None:
+    """Стартовая фаза: база доступна, схема актуальна, пул прогрет."""
+    await wait_for_db()
+    if MIGRATE_ON_STARTUP:
+        await run_migrations()
+    await prewarm_pool()
+
+
+async def check_database(timeout: float = HEALTH_DB_TIMEOUT) -> bool:
+    """Проверка готовности: SELECT 1 через пул за timeout секунд."""
+    try:
+        async with asyncio.timeout(timeout):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        return True
+    except (asyncio.TimeoutError, DBAPIError, OSError) as e:
+        logger.warning(f"Database readiness check failed: {e}")
+        return False
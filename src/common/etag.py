@@ -0,0 +1,18 @@
+def weak_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Слабое сравнение по RFC 9110: префикс W/ не учитывается,
+    If-None-Match может содержать список тегов или "*".
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
@@ -0,0 +1,254 @@
+import asyncio
+import random
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable
+
+import asyncpg
+import orjson
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.common.config import (
+    DB_HOST,
+    DB_NAME,
+    DB_PASS,
+    DB_PORT,
+    DB_USER,
+    EVENTS_BACKEND,
+    EVENTS_CHANNEL,
+    EVENTS_HEARTBEAT_SECONDS,
+    EVENTS_QUEUE_SIZE,
+    EVENTS_RECONNECT_BACKOFF,
+    EVENTS_RECONNECT_MAX_DELAY,
+)
+from src.common.database import engine, run_after_commit
+from src.common.metrics import registry
+
+events_dropped_subscribers_total = registry.counter(
+    "events_dropped_subscribers_total", "Live update subscribers dropped as too slow"
+)
+
+# Ограничение NOTIFY — 8000 байт; длинные события уходят без тела задачи
+NOTIFY_MAX_PAYLOAD = 7900
+
+# Служебные события подписчику: отключён за отставание / возможен пропуск
+DROPPED = {"type": "dropped"}
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+
+
+class EventsBackend(ABC):
+    """Транспорт событий: доставляет опубликованное в EventHub.deliver."""
+
+    def __init__(self, deliver: Callable[[int, dict], None]):
+        self.deliver = deliver
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(
+        self, session: AsyncSession | None, user_id: int, event: dict
+    ) -> None:
+        raise NotImplementedError
+
+
+class LocalBackend(EventsBackend):
+    """Подписчики только этого процесса; доставка после коммита транзакции."""
+
+    async def publish(self, session, user_id, event):
+        run_after_commit(session, lambda: self.deliver(user_id, event))
+
+
+class PostgresNotifyBackend(EventsBackend):
+    """
+    Общий для воркеров канал через LISTEN/NOTIFY. pg_notify выполняется
+    в транзакции изменения, поэтому Postgres доставит событие только после
+    её коммита и не доставит при откате. Каждый воркер держит одно
+    соединение LISTEN и раздаёт события своим подписчикам; после
+    переподключения подписчики получают resync (события могли потеряться).
+    """
+
+    def __init__(self, deliver, channel: str = EVENTS_CHANNEL, resync=None):
+        super().__init__(deliver)
+        self.channel = channel
+        self.resync = resync
+        self._listener: asyncio.Task | None = None
+
+    async def publish(self, session, user_id, event):
+        payload = orjson.dumps({"user_id": user_id, "event": event})
+        if len(payload) > NOTIFY_MAX_PAYLOAD:
+            event = {key: value for key, value in event.items() if key != "task"}
+            payload = orjson.dumps({"user_id": user_id, "event": event})
+        stmt = select(func.pg_notify(self.channel, payload.decode()))
+        if session is not None:
+            await session.execute(stmt)
+            return
+        async with engine.begin() as conn:
+            await conn.execute(stmt)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        message = orjson.loads(payload)
+        self.deliver(message["user_id"], message["event"])
+
+    async def _backoff(self, attempt: int) -> None:
+        delay = min(EVENTS_RECONNECT_BACKOFF * 2**attempt, EVENTS_RECONNECT_MAX_DELAY)
+        await asyncio.sleep(random.uniform(0, delay))
+
+    async def _listen(self) -> None:
+        reconnect = False
+        # Число неудачных попыток подряд; сбрасывается после успешного LISTEN
+        attempt = 0
+        while True:
+            try:
+                conn = await asyncpg.connect(
+                    user=DB_USER,
+                    password=DB_PASS,
+                    database=DB_NAME,
+                    host=DB_HOST,
+                    port=DB_PORT,
+                )
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning(f"Events listener cannot connect: {e}")
+                await self._backoff(attempt)
+                attempt += 1
+                continue
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _: closed.set())
+            try:
+                await conn.add_listener(self.channel, self._on_notify)
+                if reconnect and self.resync is not None:
+                    self.resync()
+                reconnect = True
+                attempt = 0
+                await closed.wait()
+                logger.warning("Events listener connection lost, reconnecting")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning(f"Events listener cannot listen: {e}")
+            finally:
+                if not conn.is_closed():
+                    await conn.close()
+            # Без паузы потеря соединения или отказ LISTEN дают цикл
+            # мгновенных переподключений
+            await self._backoff(attempt)
+            attempt += 1
+
+    async def start(self) -> None:
+        self._listener = asyncio.create_task(self._listen(), name="events-listener")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+
+
+class EventHub:
+    """
+    Pub/sub событий по пользователю внутри процесса. У каждого подписчика
+    своя ограниченная очередь; подписчик, не успевающий её разбирать,
+    отключается (получает dropped и должен перечитать данные), а не
+    замедляет публикацию и не копит память.
+    """
+
+    def __init__(self, backend: str = EVENTS_BACKEND, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[Subscription]] = {}
+        if backend == "postgres":
+            self.backend: EventsBackend = PostgresNotifyBackend(
+                self.deliver, resync=self.resync
+            )
+        else:
+            self.backend = LocalBackend(self.deliver)
+        registry.gauge(
+            "events_subscribers", "Open live update streams", self.subscriber_count
+        )
+
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subs = self._subscribers.get(subscription.user_id)
+        if subs is None:
+            return
+        subs.discard(subscription)
+        if not subs:
+            del self._subscribers[subscription.user_id]
+
+    async def publish(
+        self, session: AsyncSession | None, user_id: int, event: dict
+    ) -> None:
+        await self.backend.publish(session, user_id, event)
+
+    def deliver(self, user_id: int, event: dict) -> None:
+        for subscription in list(self._subscribers.get(user_id, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def resync(self) -> None:
+        for subs in list(self._subscribers.values()):
+            for subscription in list(subs):
+                try:
+                    subscription.queue.put_nowait(RESYNC)
+                except asyncio.QueueFull:
+                    self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        self.unsubscribe(subscription)
+        # Очередь освобождается целиком: в ней остаётся только DROPPED
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(DROPPED)
+        events_dropped_subscribers_total.inc()
+
+    async def stream(
+        self, user_id: int, heartbeat: float = EVENTS_HEARTBEAT_SECONDS
+    ) -> AsyncIterator[bytes]:
+        """
+        Server-Sent Events для пользователя. Комментарий-heartbeat держит
+        соединение через прокси; после dropped поток завершается.
+        """
+        subscription = self.subscribe(user_id)
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                yield b"event: %s\ndata: %s\n\n" % (
+                    event["type"].encode(),
+                    orjson.dumps(event),
+                )
+                if event is DROPPED:
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+
+event_hub = EventHub()
@@ -6,6 +6,11 @@ class UserNotAuthorizedException(HTTPException):
         super().__init__(status_code=401, detail="User is not authorized")
 
 
+class AdminRequiredException(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=403, detail="Admin access required")
+
+
 class UserCredentialsException(HTTPException):
     def __init__(self):
         super().__init__(status_code=401, detail="Incorrect email or password")
@@ -66,3 +71,27 @@ class InvalidPasswordExeption(HTTPException):
             status_code=422,
             detail="Invalid password",
         )
+
+
+class InvalidCursorException(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=400, detail="Invalid pagination cursor")
+
+
+class PomodoroUnavailableException(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=503, detail="Pomodoro service is unavailable")
+
+
+class MailQueueFullException(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=503, detail="Mail queue is full, try again later")
+
+
+class TooManyRequestsException(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=429,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
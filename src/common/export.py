@@ -0,0 +1,37 @@
+import csv
+import io
+from collections.abc import AsyncIterator, Sequence
+
+import orjson
+from sqlalchemy import Row
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def ndjson_chunks(
+    partitions: AsyncIterator[Sequence[Row]],
+) -> AsyncIterator[bytes]:
+    """Одна JSON-строка на запись, один chunk ответа на пачку курсора."""
+    async for rows in partitions:
+        yield b"".join(
+            orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE)
+            for row in rows
+        )
+
+
+async def csv_chunks(
+    columns: Sequence[str], partitions: AsyncIterator[Sequence[Row]]
+) -> AsyncIterator[bytes]:
+    """Заголовок уходит сразу, до первого обращения к БД."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
@@ -0,0 +1,27 @@
+from collections.abc import Mapping, Sequence
+
+import orjson
+from fastapi import Response
+
+# Как у pydantic: datetime в UTC сериализуется с суффиксом Z
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def rows_page_response(
+    page: dict, columns: Sequence, headers: Mapping[str, str] | None = None
+) -> Response:
+    """
+    Страница {"items", "next_cursor"} из строк выборки (Row), а не
+    ORM-объектов: без pydantic-моделей, jsonable_encoder и повторной
+    проверки по response_model. Значения строк сопоставляются columns
+    по порядку; лишние колонки в конце строки (ключ курсора) не выводятся.
+    """
+    fields = [column.key for column in columns]
+    body = orjson.dumps(
+        {
+            "items": [dict(zip(fields, row)) for row in page["items"]],
+            "next_cursor": page["next_cursor"],
+        },
+        option=ORJSON_OPTIONS,
+    )
+    return Response(body, media_type="application/json", headers=headers)
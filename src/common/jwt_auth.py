@@ -1,42 +1,44 @@
+import asyncio
 import hmac
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import bcrypt
-from fastapi import HTTPException, Security
+from fastapi import Depends, HTTPException, Security
 from fastapi.security import APIKeyCookie
-from fastapi_mail import MessageSchema, FastMail, ConnectionConfig
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.config import (
+    ADMIN_EMAILS,
     DEFAULT_ENCODING,
     HMAC_DIGEST_MODE,
     JWT_SIGN_ALGORITHM,
     TOKEN_SECRET_KEY,
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    MAIL_PASSWORD_APP,
+    PASSWORD_HASH_WORKERS,
 )
+from src.common.database import get_db_session
+from src.common.mailer import MailDispatcher
+from src.common.metrics import password_hash_duration_seconds
 from src.common.exceptions import (
+    AdminRequiredException,
     InvalidTokenException,
     UserAlreadyExistsException,
     UserNotAuthorizedException,
 )
+from src.user.cache import user_cache
 from src.user.models import User
 from src.user.repository import UserRepository
 
 # Для получения токена из cookie
 auth_scheme = APIKeyCookie(name="authorization", auto_error=False)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-conf = ConnectionConfig(
-    MAIL_USERNAME="matvey.sherbaev@gmail.com",
-    MAIL_PASSWORD=MAIL_PASSWORD_APP,
-    MAIL_FROM="matvey.sherbaev@gmail.com",
-    MAIL_PORT=587,
-    MAIL_SERVER="smtp.gmail.com",
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=False,
+# bcrypt отпускает GIL на время хеширования, поэтому пула потоков достаточно,
+# а его размер ограничивает число одновременно считаемых хешей
+password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
 )
 
 
@@ -64,6 +66,31 @@ def verify_password(
     return bcrypt.checkpw(peppered, hashed_password.encode(encoding))
 
 
+def _timed(fn, *args):
+    started = time.perf_counter()
+    return fn(*args), time.perf_counter() - started
+
+
+async def hash_password(password: str) -> str:
+    """get_password_hash вне event loop, в пуле password_executor."""
+    loop = asyncio.get_running_loop()
+    hashed, elapsed = await loop.run_in_executor(
+        password_executor, _timed, get_password_hash, password
+    )
+    password_hash_duration_seconds.observe(elapsed, "hash")
+    return hashed
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    """verify_password вне event loop, в пуле password_executor."""
+    loop = asyncio.get_running_loop()
+    is_valid, elapsed = await loop.run_in_executor(
+        password_executor, _timed, verify_password, plain_password, hashed_password
+    )
+    password_hash_duration_seconds.observe(elapsed, "verify")
+    return is_valid
+
+
 def create_access_token(email: str) -> str:
     data: dict[str, str | datetime] = {"sub": email}
     expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -74,26 +101,52 @@ def create_access_token(email: str) -> str:
     return encoded_jwt
 
 
-async def create_user(user_data: dict) -> User:
+async def create_user(
+    user_data: dict, user_repository: UserRepository | None = None
+) -> User:
     """
     Регистрирует пользователя: проверяет наличие email в БД,
     хеширует пароль и сохраняет запись.
     """
-    user_repository = UserRepository()
+    user_repository = user_repository or UserRepository()
     existing_user = await user_repository.find_by_email(user_data["email"])
     if existing_user is not None:
         raise UserAlreadyExistsException
-    user_data["password"] = get_password_hash(user_data["password"])
+    user_data["password"] = await hash_password(user_data["password"])
     user = await user_repository.create_one(user_data)
     return user
 
 
-async def get_user_from_db(email: str) -> User | None:
-    user_repository = UserRepository()
+async def get_user_from_db(
+    email: str, session: AsyncSession | None = None
+) -> User | None:
+    user_repository = UserRepository(session)
     return await user_repository.find_by_email(email)
 
 
-async def get_current_user(token_in_cookie: str = Security(auth_scheme)) -> User:
+async def get_cached_user(
+    email: str, session: AsyncSession | None = None
+) -> User | None:
+    """Пользователь по subject токена: сначала из кэша, затем из БД."""
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+    generation = user_cache.generation
+    user = await get_user_from_db(email, session)
+    if user is not None:
+        # В кэш попадает отсоединённый объект: иначе откат сессии запроса
+        # (любой ответ с ошибкой) сделает его атрибуты устаревшими, и
+        # следующий запрос упадёт на их загрузке без сессии
+        if session is not None:
+            session.expunge(user)
+        user_cache.set(email, user, generation=generation)
+    return user
+
+
+async def get_current_user(
+    token_in_cookie: str = Security(auth_scheme),
+    session: AsyncSession = Depends(get_db_session),
+) -> User:
     if not token_in_cookie:
         raise UserNotAuthorizedException
     try:
@@ -104,7 +157,7 @@ async def get_current_user(token_in_cookie: str = Security(auth_scheme)) -> User
         exp_time = datetime.utcfromtimestamp(payload.get("exp"))
         if email is None or exp_time < datetime.utcnow():
             raise JWTError
-        user = await get_user_from_db(email)
+        user = await get_cached_user(email, session)
         if user is None:
             raise InvalidTokenException
 
@@ -117,19 +170,22 @@ async def get_current_user(token_in_cookie: str = Security(auth_scheme)) -> User
         )
 
 
+async def get_current_admin(user: User = Depends(get_current_user)) -> User:
+    """Текущий пользователь, если его email указан в ADMIN_EMAILS, иначе 403."""
+    if user.email.lower() not in ADMIN_EMAILS:
+        raise AdminRequiredException
+    return user
+
+
 def create_password_reset_token(email: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode = {"sub": email, "exp": expire}
     return jwt.encode(to_encode, TOKEN_SECRET_KEY, algorithm=JWT_SIGN_ALGORITHM)
 
 
-async def send_password_reset_email(email: str, token: str):
+def send_password_reset_email(dispatcher: MailDispatcher, email: str, token: str):
+    """Ставит письмо в очередь отправки; SMTP-сессия в запросе не открывается."""
     reset_url = f"http://localhost:3000/reset-password?token={token}"
-    message = MessageSchema(
-        subject="Password Reset",
-        recipients=[email],
-        body=f"Click to reset your password: {reset_url}",
-        subtype="plain",
+    dispatcher.enqueue(
+        email, "Password Reset", f"Click to reset your password: {reset_url}"
     )
-    fm = FastMail(conf)
-    await fm.send_message(message)
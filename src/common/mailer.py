@@ -0,0 +1,175 @@
+import asyncio
+import random
+from email.message import EmailMessage
+
+import aiosmtplib
+from fastapi import Request
+from loguru import logger
+
+from src.common.config import (
+    MAIL_BATCH_SIZE,
+    MAIL_MAX_RETRIES,
+    MAIL_QUEUE_SIZE,
+    MAIL_RETRY_BACKOFF,
+    SMTP_FROM,
+    SMTP_HOST,
+    SMTP_IDLE_TIMEOUT,
+    SMTP_PASSWORD,
+    SMTP_PORT,
+    SMTP_START_TLS,
+    SMTP_TIMEOUT,
+    SMTP_USERNAME,
+    SMTP_VALIDATE_CERTS,
+)
+from src.common.exceptions import MailQueueFullException
+from src.common.metrics import registry
+
+mail_sent_total = registry.counter(
+    "mail_sent_total", "Outgoing mail by delivery outcome", ("outcome",)
+)
+
+
+class MailDispatcher:
+    """
+    Фоновая отправка почты. Обработчики запросов только кладут письмо
+    в ограниченную очередь; единственный воркер забирает письма пачками
+    и отправляет их через одно SMTP-соединение, которое держится открытым,
+    пока очередь не простаивает idle_timeout секунд. Временные ошибки
+    повторяются с экспоненциальной задержкой, постоянные (5xx, отказ
+    получателя) — нет.
+    """
+
+    def __init__(
+        self,
+        hostname: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        username: str | None = SMTP_USERNAME,
+        password: str | None = SMTP_PASSWORD,
+        sender: str = SMTP_FROM,
+        start_tls: bool = SMTP_START_TLS,
+        validate_certs: bool = SMTP_VALIDATE_CERTS,
+        timeout: float = SMTP_TIMEOUT,
+        idle_timeout: float = SMTP_IDLE_TIMEOUT,
+        queue_size: int = MAIL_QUEUE_SIZE,
+        batch_size: int = MAIL_BATCH_SIZE,
+        max_retries: int = MAIL_MAX_RETRIES,
+        retry_backoff: float = MAIL_RETRY_BACKOFF,
+    ):
+        self.sender = sender
+        self.idle_timeout = idle_timeout
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._smtp_options = dict(
+            hostname=hostname,
+            port=port,
+            username=username or None,
+            password=password if username else None,
+            start_tls=start_tls,
+            validate_certs=validate_certs,
+            timeout=timeout,
+        )
+        self._queue: asyncio.Queue[EmailMessage] = asyncio.Queue(maxsize=queue_size)
+        self._smtp: aiosmtplib.SMTP | None = None
+        self._worker: asyncio.Task | None = None
+        registry.gauge(
+            "mail_queue_size", "Messages waiting for delivery", self._queue.qsize
+        )
+
+    def enqueue(self, recipient: str, subject: str, body: str) -> None:
+        """Кладёт письмо в очередь без ожидания; при переполнении — 503."""
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(body)
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            mail_sent_total.inc("rejected")
+            raise MailQueueFullException()
+
+    def start(self) -> None:
+        self._worker = asyncio.create_task(self._run(), name="mail-dispatcher")
+
+    async def stop(self, drain_timeout: float = 10) -> None:
+        """Дожидается отправки уже принятых писем (не дольше drain_timeout)."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Mail queue not drained, {self._queue.qsize()} dropped")
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        await self._disconnect()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                message = await asyncio.wait_for(self._queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                await self._disconnect()
+                continue
+            batch = [message]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                for message in batch:
+                    try:
+                        await self._deliver(message)
+                    except Exception:
+                        # Непредвиденная ошибка не должна завершить воркер:
+                        # письмо теряется, остальные отправляются
+                        mail_sent_total.inc("failed")
+                        logger.exception(f"Mail to {message['To']} not delivered")
+                        await self._disconnect()
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, message: EmailMessage) -> None:
+        attempt = 0
+        while True:
+            try:
+                smtp = await self._connect()
+                await smtp.send_message(message)
+                mail_sent_total.inc("sent")
+                return
+            except (aiosmtplib.SMTPRecipientsRefused, aiosmtplib.SMTPSenderRefused) as e:
+                permanent, error = True, e
+            except aiosmtplib.SMTPResponseException as e:
+                permanent, error = e.code >= 500, e
+            except (aiosmtplib.SMTPException, OSError) as e:
+                permanent, error = False, e
+            # После ошибки соединение могло остаться в неизвестном состоянии
+            await self._disconnect()
+            if permanent or attempt >= self.max_retries:
+                mail_sent_total.inc("failed")
+                logger.error(f"Mail to {message['To']} not delivered: {error}")
+                return
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2**attempt))
+            attempt += 1
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        if self._smtp is None or not self._smtp.is_connected:
+            smtp = aiosmtplib.SMTP(**self._smtp_options)
+            await smtp.connect()
+            self._smtp = smtp
+        return self._smtp
+
+    async def _disconnect(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            smtp.close()
+
+
+def mail_dispatcher(request: Request) -> MailDispatcher:
+    return request.app.state.mail_dispatcher
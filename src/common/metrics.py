@@ -0,0 +1,172 @@
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+# Границы бакетов гистограмм латентности, в секундах
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for label_values, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными бакетами. observe — поиск бакета
+    бинарным поиском и три инкремента, без аллокаций на горячем пути
+    (кроме первого наблюдения для нового набора меток).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # метки -> [счётчики по бакетам (+Inf последним), сумма, количество]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        bucket_names = (*self.labels, "le")
+        for label_values, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_names, (*label_values, bound))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Gauge:
+    """Значение считывается функцией в момент выдачи /metrics."""
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {self.collect()}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram | Gauge] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: tuple[str, ...] = (), **kw):
+        return self.register(Histogram(name, documentation, labels, **kw))
+
+    def gauge(self, name: str, documentation: str, collect: Callable[[], float]):
+        return self.register(Gauge(name, documentation, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+db_pool_checkout_seconds = registry.histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled DB connection"
+)
+pomodoro_request_duration_seconds = registry.histogram(
+    "pomodoro_request_duration_seconds",
+    "Outbound pomodoro backend call latency",
+    ("path", "outcome"),
+)
+password_hash_duration_seconds = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time", ("operation",)
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: число запросов, коды ответов и латентность по шаблону
+    маршрута (/api/tasks/{task_id}), а не по сырому пути, чтобы число
+    временных рядов не зависело от id в URL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests_total.inc(method, path, status)
+            http_request_duration_seconds.observe(
+                time.perf_counter() - started, method, path
+            )
@@ -0,0 +1,46 @@
+import base64
+from typing import Generic, TypeVar
+
+import orjson
+from pydantic import BaseModel
+
+from src.common.exceptions import InvalidCursorException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    items: list[ItemT]
+    next_cursor: str | None = None
+
+
+def encode_cursor(*values) -> str:
+    """Упаковывает ключ последней строки страницы в непрозрачную строку."""
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple:
+    """Распаковывает курсор обратно в кортеж значений ключа сортировки."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = orjson.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise InvalidCursorException()
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorException()
+    return tuple(values)
+
+
+def split_page(rows, limit: int, key) -> tuple[list, str | None]:
+    """
+    Репозитории выбирают limit + 1 строку: лишняя строка означает,
+    что следующая страница существует, и сама в ответ не попадает.
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
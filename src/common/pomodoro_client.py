@@ -0,0 +1,248 @@
+import asyncio
+import random
+import time
+
+import httpx
+from fastapi import Request
+from loguru import logger
+
+from src.common.config import (
+    POMODORO_BACKEND_URL,
+    POMODORO_BREAKER_FAILURES,
+    POMODORO_BREAKER_RESET_SECONDS,
+    POMODORO_CACHE_MAX_SIZE,
+    POMODORO_CACHE_STALE_SECONDS,
+    POMODORO_CACHE_TTL_SECONDS,
+    POMODORO_CONNECT_TIMEOUT,
+    POMODORO_MAX_CONNECTIONS,
+    POMODORO_MAX_RETRIES,
+    POMODORO_READ_TIMEOUT,
+    POMODORO_RETRY_BACKOFF,
+)
+from src.common.cache import SingleFlightCache
+from src.common.exceptions import PomodoroUnavailableException
+from src.common.metrics import pomodoro_request_duration_seconds, registry
+
+
+class CircuitBreaker:
+    """
+    Размыкается после failure_threshold ошибок подряд и reset_timeout секунд
+    отклоняет вызовы сразу. Затем пропускает один пробный вызов (half-open):
+    успех замыкает цепь, ошибка снова размыкает её.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def release(self) -> None:
+        """Освобождает пробный вызов, не засчитывая ни успеха, ни ошибки."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("Pomodoro backend circuit opened")
+            self.opened_at = time.monotonic()
+
+
+class PomodoroClient:
+    """
+    Клиент второго бэкенда (pomodoro) на всё время жизни приложения:
+    общий пул keep-alive соединений, явные таймауты, ограниченные повторы
+    с джиттером и circuit breaker. Чтения таймера и статистики кэшируются
+    по пользователю (SingleFlightCache); запуск и остановка таймера
+    сбрасывают кэш пользователя.
+    """
+
+    def __init__(
+        self,
+        base_url: str = POMODORO_BACKEND_URL,
+        max_retries: int = POMODORO_MAX_RETRIES,
+        retry_backoff: float = POMODORO_RETRY_BACKOFF,
+        breaker: CircuitBreaker | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: SingleFlightCache | None = None,
+    ):
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker or CircuitBreaker(
+            POMODORO_BREAKER_FAILURES, POMODORO_BREAKER_RESET_SECONDS
+        )
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(
+                POMODORO_READ_TIMEOUT, connect=POMODORO_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=POMODORO_MAX_CONNECTIONS,
+                max_keepalive_connections=POMODORO_MAX_CONNECTIONS,
+            ),
+            transport=transport,
+        )
+        # Не `cache or ...`: пустой кэш ложен (__len__ == 0)
+        self.cache = (
+            cache
+            if cache is not None
+            else SingleFlightCache(
+                POMODORO_CACHE_MAX_SIZE,
+                POMODORO_CACHE_TTL_SECONDS,
+                POMODORO_CACHE_STALE_SECONDS,
+            )
+        )
+        registry.gauge(
+            "pomodoro_cache_size", "Cached pomodoro reads", lambda: len(self.cache)
+        )
+        registry.gauge(
+            "pomodoro_cache_hits", "Pomodoro cache fresh hits", lambda: self.cache.hits
+        )
+        registry.gauge(
+            "pomodoro_cache_stale_hits",
+            "Pomodoro cache stale hits served while refreshing",
+            lambda: self.cache.stale_hits,
+        )
+        registry.gauge(
+            "pomodoro_cache_misses", "Pomodoro cache misses", lambda: self.cache.misses
+        )
+        registry.gauge(
+            "pomodoro_cache_coalesced",
+            "Pomodoro reads that joined an in-flight upstream call",
+            lambda: self.cache.coalesced,
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def request(
+        self, method: str, path: str, params: dict, idempotent: bool
+    ) -> httpx.Response:
+        """
+        Запрос с повторами. Ошибки соединения повторяются всегда (запрос
+        не ушёл), таймауты чтения и 5xx — только для идемпотентных запросов,
+        чтобы не запустить таймер дважды.
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise PomodoroUnavailableException()
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                response = await self._client.request(method, path, params=params)
+                outcome = str(response.status_code)
+                if response.status_code < 500:
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                retryable = idempotent
+                error: Exception = httpx.HTTPStatusError(
+                    f"Pomodoro backend returned {response.status_code}",
+                    request=response.request,
+                    response=response,
+                )
+            except httpx.HTTPStatusError:
+                raise
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                retryable, error = True, e
+            except httpx.TransportError as e:
+                retryable, error = idempotent, e
+            except asyncio.CancelledError:
+                # Вызывающий отменён (клиент отключился): бэкенд не виноват,
+                # но пробный вызов half-open должен освободиться, иначе цепь
+                # останется разомкнутой до перезапуска
+                self.breaker.release()
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            finally:
+                pomodoro_request_duration_seconds.observe(
+                    time.perf_counter() - started, path, outcome
+                )
+
+            self.breaker.record_failure()
+            if not retryable or attempt >= self.max_retries:
+                if isinstance(error, httpx.HTTPStatusError):
+                    raise error
+                raise PomodoroUnavailableException() from error
+            # Полный джиттер, чтобы повторы разных запросов не шли залпом
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2**attempt))
+            attempt += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.cache.invalidate(("started", user_id))
+        self.cache.invalidate(("stats", user_id))
+
+    async def start_timer(
+        self, user_id: int, task_id: int, work_minutes: int = 25, chill_minutes: int = 5
+    ) -> None:
+        try:
+            await self.request(
+                "POST",
+                "/start",
+                {
+                    "userId": user_id,
+                    "taskId": task_id,
+                    "workMinutes": work_minutes,
+                    "chillMinutes": chill_minutes,
+                },
+                idempotent=False,
+            )
+        finally:
+            # И при ошибке: запрос мог дойти до бэкенда и запустить таймер
+            self.invalidate_user(user_id)
+
+    async def stop_timer(self, user_id: int, task_id: int) -> None:
+        try:
+            await self.request(
+                "POST", "/stop", {"userId": user_id, "taskId": task_id}, idempotent=False
+            )
+        finally:
+            self.invalidate_user(user_id)
+
+    async def _get_json(self, path: str, user_id: int):
+        response = await self.request("GET", path, {"userId": user_id}, idempotent=True)
+        return response.json()
+
+    async def get_started_pomodoro(self, user_id: int):
+        return await self.cache.get(
+            ("started", user_id),
+            lambda: self._get_json("/get-started-pomodoro", user_id),
+        )
+
+    async def get_pomodoro_stats(self, user_id: int):
+        return await self.cache.get(
+            ("stats", user_id),
+            lambda: self._get_json("/get-pomodoro-stats", user_id),
+        )
+
+
+def pomodoro_client(request: Request) -> PomodoroClient:
+    return request.app.state.pomodoro_client
@@ -0,0 +1,235 @@
+import math
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import sqlalchemy as sa
+from fastapi import Request
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.common.config import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_EMAIL_BURST,
+    RATE_LIMIT_EMAIL_PER_MINUTE,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_IP_BURST,
+    RATE_LIMIT_IP_PER_MINUTE,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_SHARDS,
+    RATE_LIMIT_TRUST_FORWARDED,
+)
+from src.common.database import Base, engine
+from src.common.exceptions import TooManyRequestsException
+from src.common.metrics import registry
+
+rate_limited_total = registry.counter(
+    "rate_limited_total", "Requests rejected by the rate limiter", ("scope",)
+)
+
+
+class RateLimitBucket(Base):
+    """
+    Корзины общего бэкенда. UNLOGGED: не пишется в WAL и не реплицируется,
+    после сбоя БД очищается — для счётчиков попыток это допустимо.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key: Mapped[str] = mapped_column(sa.String(320), primary_key=True)
+    tokens: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    updated_at: Mapped[float] = mapped_column(sa.Float, nullable=False)
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        """
+        Забирает один токен из корзины key (ёмкость capacity, пополнение
+        rate токенов в секунду). Возвращает 0, если токен был, иначе
+        сколько секунд ждать до следующего.
+        """
+        raise NotImplementedError
+
+
+class InMemoryBackend(RateLimitBackend):
+    """
+    Корзины в памяти процесса, разбитые на шарды по хешу ключа: у каждого
+    шарда свой lock и свой LRU-порядок. Операция — O(1): словарь плюс
+    move_to_end. Устаревшие корзины (полностью пополнившиеся, т.е.
+    неотличимые от новой) вытесняются с головы LRU при каждом обращении,
+    а размер шарда ограничен max_keys / shards.
+    """
+
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self._shards = [OrderedDict() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._shard_max_keys = max(1, max_keys // shards)
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        index = hash(key) % len(self._shards)
+        buckets = self._shards[index]
+        now = time.monotonic()
+        with self._locks[index]:
+            tokens, updated_at, _ = buckets.pop(key, (capacity, now, 0))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            # Момент, когда корзина снова станет полной и её можно забыть
+            full_at = now + (capacity - tokens) / rate
+            buckets[key] = (tokens, now, full_at)
+            self._evict(buckets, now)
+        return wait
+
+    def _evict(self, buckets: OrderedDict, now: float) -> None:
+        while buckets:
+            _, (_, _, full_at) = next(iter(buckets.items()))
+            if full_at > now and len(buckets) <= self._shard_max_keys:
+                break
+            buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for buckets in self._shards)
+
+
+class PostgresBackend(RateLimitBackend):
+    """
+    Общие для всех воркеров корзины в UNLOGGED-таблице. Пополнение и
+    списание — один атомарный INSERT ... ON CONFLICT DO UPDATE по первичному
+    ключу; строка возвращается только если токен был. Полные корзины
+    периодически удаляются (с вероятностью cleanup_probability на вызов).
+    """
+
+    # Параметры приводятся к double precision явно: иначе Postgres выводит
+    # тип :capacity из «:capacity - 1» как integer и дробная ёмкость
+    # из конфигурации молча усекается
+    _take = sa.text(
+        """
+        INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+        VALUES (
+            :key,
+            CAST(:capacity AS double precision) - 1,
+            extract(epoch FROM clock_timestamp())
+        )
+        ON CONFLICT (key) DO UPDATE
+        SET tokens = least(
+                CAST(:capacity AS double precision),
+                b.tokens + (extract(epoch FROM clock_timestamp()) - b.updated_at)
+                    * CAST(:rate AS double precision)
+            ) - 1,
+            updated_at = extract(epoch FROM clock_timestamp())
+        WHERE least(
+                CAST(:capacity AS double precision),
+                b.tokens + (extract(epoch FROM clock_timestamp()) - b.updated_at)
+                    * CAST(:rate AS double precision)
+            ) >= 1
+        RETURNING b.tokens
+        """
+    )
+    _wait = sa.text(
+        """
+        SELECT (1 - (b.tokens + (extract(epoch FROM clock_timestamp()) - b.updated_at)
+                     * CAST(:rate AS double precision)))
+               / CAST(:rate AS double precision)
+        FROM rate_limit_buckets AS b
+        WHERE b.key = :key
+        """
+    )
+    _cleanup = sa.text(
+        """
+        DELETE FROM rate_limit_buckets
+        WHERE updated_at
+              + (CAST(:capacity AS double precision) - tokens)
+                / CAST(:rate AS double precision)
+              < extract(epoch FROM clock_timestamp())
+        """
+    )
+
+    def __init__(self, cleanup_probability: float = 0.001):
+        self.cleanup_probability = cleanup_probability
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        params = {"key": key, "capacity": capacity, "rate": rate}
+        async with engine.begin() as conn:
+            res = await conn.execute(self._take, params)
+            if res.first() is not None:
+                wait = 0.0
+            else:
+                res = await conn.execute(self._wait, params)
+                wait = max(0.0, res.scalar_one_or_none() or 0.0)
+            if random.random() < self.cleanup_probability:
+                await conn.execute(self._cleanup, params)
+        return wait
+
+
+def _bucket_limit(scope: str, burst: float, per_minute: float) -> tuple[float, float]:
+    """
+    (ёмкость, пополнение в секунду) из настроек RATE_LIMIT_<scope>_*.
+    Корзина без пополнения или меньше одного токена не пропустит ни одного
+    запроса, а нулевая скорость ломает расчёт ожидания, поэтому такие
+    настройки отвергаются при старте.
+    """
+    if burst < 1 or per_minute <= 0:
+        raise ValueError(
+            f"RATE_LIMIT_{scope}_BURST must be >= 1 and "
+            f"RATE_LIMIT_{scope}_PER_MINUTE must be > 0, "
+            f"got {burst} and {per_minute}"
+        )
+    return burst, per_minute / 60
+
+
+class RateLimiter:
+    """
+    Token bucket по IP клиента и по email. Проверка вызывается в начале
+    обработчика, до обращения к пользователю и bcrypt: при исчерпании
+    корзины — 429 с Retry-After.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        enabled: bool = RATE_LIMIT_ENABLED,
+        trust_forwarded: bool = RATE_LIMIT_TRUST_FORWARDED,
+        ip_limit: tuple[float, float] = (RATE_LIMIT_IP_BURST, RATE_LIMIT_IP_PER_MINUTE),
+        email_limit: tuple[float, float] = (
+            RATE_LIMIT_EMAIL_BURST,
+            RATE_LIMIT_EMAIL_PER_MINUTE,
+        ),
+    ):
+        """ip_limit и email_limit — (ёмкость, попыток в минуту)."""
+        self.backend = backend
+        self.enabled = enabled
+        self.trust_forwarded = trust_forwarded
+        self.ip_limit = _bucket_limit("IP", *ip_limit)
+        self.email_limit = _bucket_limit("EMAIL", *email_limit)
+
+    @classmethod
+    def from_config(cls) -> "RateLimiter":
+        backend = PostgresBackend() if RATE_LIMIT_BACKEND == "postgres" else InMemoryBackend()
+        return cls(backend)
+
+    def client_ip(self, request: Request) -> str:
+        if self.trust_forwarded:
+            forwarded = request.headers.get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        return request.client.host if request.client else "unknown"
+
+    async def check(self, scope: str, request: Request, email: str | None = None) -> None:
+        if not self.enabled:
+            return
+        keys = [(f"{scope}:ip:{self.client_ip(request)}", self.ip_limit)]
+        if email:
+            keys.append((f"{scope}:email:{email.lower()}", self.email_limit))
+        for key, (capacity, rate) in keys:
+            wait = await self.backend.take(key, capacity, rate)
+            if wait:
+                rate_limited_total.inc(scope)
+                raise TooManyRequestsException(math.ceil(wait))
+
+
+def rate_limiter(request: Request) -> RateLimiter:
+    return request.app.state.rate_limiter
@@ -1,11 +1,16 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
 from typing import Generic, Protocol, TypeVar
 
-from sqlalchemy import delete, insert, select, update
+from sqlalchemy import Row, delete, insert, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 
-from src.common.database import async_session_maker
+from src.common.database import async_session_maker, replicas
 from src.common.exceptions import ItemNotExist
+from src.common.pagination import DEFAULT_PAGE_SIZE, decode_cursor, split_page
 
 
 class HasId(Protocol):
@@ -39,51 +44,135 @@ class AbstractRepository(ABC, Generic[T]):
 
 class SQLAlchemyRepository(AbstractRepository[T]):
     model: type[T]
+    # Колонки схемы ответа (в порядке её полей) для выборок строками
+    row_columns: tuple = ()
+
+    def __init__(self, session: AsyncSession | None = None):
+        # Сессия запроса (unit of work) из get_db_session. Без неё каждый
+        # метод открывает собственную сессию и сам коммитит её.
+        self.session = session
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[AsyncSession]:
+        if self.session is not None:
+            yield self.session
+            return
+        async with async_session_maker() as session:
+            async with session.begin():
+                yield session
+
+    @asynccontextmanager
+    async def _read_session(
+        self, user_id: int | None = None
+    ) -> AsyncIterator[AsyncSession]:
+        """
+        Сессия для чтения: реплика, если они настроены и здоровы. Основная
+        БД — если запрос уже писал в своей транзакции, если user_id недавно
+        писал сам (read-your-writes) или если ни одна реплика не отвечает.
+        Соединение с репликой берётся сразу, чтобы при её недоступности
+        переключиться на основную БД до выполнения запроса.
+        """
+        if (
+            not replicas.enabled
+            or (self.session is not None and self.session.info.get("wrote"))
+            or replicas.is_sticky(user_id)
+        ):
+            async with self._session() as session:
+                yield session
+            return
+        while (index := replicas.choose()) is not None:
+            async with replicas.session_makers[index]() as session:
+                try:
+                    await session.connection()
+                except (DBAPIError, OSError) as e:
+                    replicas.mark_unhealthy(index, e)
+                    continue
+                session.info["replica"] = index
+                yield session
+                return
+        async with self._session() as session:
+            yield session
 
     async def create_one(self, data: dict):
-        async with async_session_maker() as session:
+        async with self._session() as session:
             stmt = insert(self.model).values(**data).returning(self.model)
             res = await session.execute(stmt)
-            await session.commit()
             return res.scalar_one()
 
     async def find_one(self, id: int):
-        async with async_session_maker() as session:
+        async with self._read_session() as session:
             stmt = select(self.model).where(self.model.id == id)
             res = await session.execute(stmt)
             return res.scalar_one()
 
     async def find_all(self):
-        async with async_session_maker() as session:
+        async with self._read_session() as session:
             stmt = select(self.model)
             res = await session.execute(stmt)
             return res.scalars().all()
 
-    async def update_one(self, id: int, data: dict):
+    async def find_page(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        as_rows: bool = False,
+    ):
+        """
+        Страница записей в порядке id: (записи, курсор следующей страницы).
+        as_rows — строки row_columns вместо ORM-объектов.
+        """
+        async with self._read_session() as session:
+            stmt = select(*self.row_columns) if as_rows else select(self.model)
+            stmt = stmt.order_by(self.model.id.asc()).limit(limit + 1)
+            if cursor is not None:
+                (last_id,) = decode_cursor(cursor, 1)
+                stmt = stmt.where(self.model.id > last_id)
+            res = await session.execute(stmt)
+            items = res.all() if as_rows else res.scalars()
+            return split_page(items, limit, lambda item: (item.id,))
+
+    async def stream_rows(
+        self, columns: Sequence, *criteria, batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Выгружает строки (не ORM-объекты) серверным курсором пачками по
+        batch_size, так что в памяти одновременно не больше одной пачки.
+        Всегда работает в собственной сессии: ответ стримится уже после
+        завершения сессии запроса.
+        """
+        stmt = (
+            select(*columns)
+            .where(*criteria)
+            .order_by(self.model.id.asc())
+            .execution_options(yield_per=batch_size)
+        )
         async with async_session_maker() as session:
+            result = await session.stream(stmt)
+            async for partition in result.partitions():
+                yield partition
+
+    async def update_one(self, id: int, data: dict):
+        async with self._session() as session:
             stmt = update(self.model).where(self.model.id == id).values(**data).returning(self.model)
             res = await session.execute(stmt)
-            await session.commit()
             return res.scalar_one_or_none()
 
     async def delete_one(self, id: int):
-        async with async_session_maker() as session:
+        async with self._session() as session:
             stmt = delete(self.model).where(self.model.id == id)
             res = await session.execute(stmt)
-            await session.commit()
 
             if res.rowcount == 0:
                 raise ItemNotExist
 
     async def update_all(self, data: dict):
-        async with async_session_maker() as session:
+        async with self._session() as session:
             stmt = update(self.model).values(**data).returning(self.model)
             res = await session.execute(stmt)
-            await session.commit()
             return res.scalars().all()
 
     async def find_one_or_none(self, item_id):
-        async with async_session_maker() as session:
+        async with self._read_session() as session:
             stmt = select(self.model).where(self.model.id == item_id)
             res = await session.execute(stmt)
             return res.scalar_one_or_none()
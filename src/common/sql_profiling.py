@@ -0,0 +1,171 @@
+import random
+import time
+from contextvars import ContextVar
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.common.config import (
+    DEBUG,
+    SQL_N_PLUS_ONE_THRESHOLD,
+    SQL_PROFILE_SAMPLE_RATE,
+    SQL_SLOW_QUERY_MS,
+)
+from src.common.metrics import registry
+
+db_slow_queries_total = registry.counter(
+    "db_slow_queries_total", "Statements slower than SQL_SLOW_QUERY_MS"
+)
+db_n_plus_one_total = registry.counter(
+    "db_n_plus_one_total",
+    "Profiled requests that repeated one statement shape too often",
+    ("method", "route"),
+)
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request",
+    "Statements per profiled request",
+    ("method", "route"),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+db_time_per_request_seconds = registry.histogram(
+    "db_time_per_request_seconds",
+    "Cumulative statement time per profiled request",
+    ("method", "route"),
+)
+
+# Сколько символов запроса попадает в лог
+LOGGED_STATEMENT_CHARS = 500
+
+
+def _for_log(statement: str) -> str:
+    return " ".join(statement.split())[:LOGGED_STATEMENT_CHARS]
+
+
+class RequestProfile:
+    """
+    SQL-профиль одного HTTP-запроса: число запросов, суммарное время в БД
+    и сколько раз встретилась каждая форма запроса. Формой считается сам
+    текст: SQLAlchemy отправляет его с плейсхолдерами, значения в нём не
+    участвуют.
+    """
+
+    __slots__ = ("count", "duration", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: dict[str, int] = {}
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement] = self.shapes.get(statement, 0) + 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Формы, выполненные threshold и более раз (признак N+1)."""
+        return [
+            (statement, count)
+            for statement, count in self.shapes.items()
+            if count >= threshold
+        ]
+
+
+# Профиль текущего запроса; None — запрос не попал в выборку
+current_profile: ContextVar[RequestProfile | None] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_started"].pop()
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record(statement, duration)
+    if SQL_SLOW_QUERY_MS and duration * 1000 >= SQL_SLOW_QUERY_MS:
+        db_slow_queries_total.inc()
+        logger.warning(f"Slow query {duration * 1000:.1f} ms: {_for_log(statement)}")
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute не вызывается для упавшего запроса: снимаем его отметку
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument(engine: AsyncEngine) -> None:
+    """
+    Подключает хуки профилирования к engine. На каждый запрос — два
+    perf_counter и проверка порога медленного лога; накопление по запросу
+    — только для попавших в выборку HTTP-запросов (SQLProfilingMiddleware).
+    """
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class SQLProfilingMiddleware:
+    """
+    ASGI-middleware: для доли SQL_PROFILE_SAMPLE_RATE запросов (в режиме
+    DEBUG — для всех) собирает RequestProfile, пишет метрики по шаблону
+    маршрута и предупреждает о N+1. В режиме DEBUG добавляет заголовок
+    Server-Timing с числом запросов и временем в БД на момент начала ответа.
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = SQL_PROFILE_SAMPLE_RATE,
+        n_plus_one_threshold: int = SQL_N_PLUS_ONE_THRESHOLD,
+        server_timing: bool = DEBUG,
+    ):
+        self.app = app
+        self.sample_rate = 1.0 if server_timing else sample_rate
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                value = (
+                    f'db;dur={profile.duration * 1000:.1f};desc="{profile.count} queries"'
+                )
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", value.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            self._report(scope, profile)
+
+    def _report(self, scope, profile: RequestProfile) -> None:
+        route = scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        method = scope["method"]
+        db_queries_per_request.observe(profile.count, method, path)
+        db_time_per_request_seconds.observe(profile.duration, method, path)
+        repeated = profile.repeated(self.n_plus_one_threshold)
+        if not repeated:
+            return
+        db_n_plus_one_total.inc(method, path)
+        for statement, count in repeated:
+            logger.warning(
+                f"Possible N+1 in {method} {path}: statement ran {count} times: "
+                f"{_for_log(statement)}"
+            )
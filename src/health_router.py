@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from src.common.database import check_database
+
+health_router = APIRouter(prefix="/health", tags=["monitoring"])
+
+
+@health_router.get("/live")
+async def live():
+    """Процесс жив и обслуживает event loop; БД не проверяется."""
+    return {"status": "ok"}
+
+
+@health_router.get("/ready")
+async def ready(request: Request):
+    """
+    Воркер готов принимать трафик: стартовая фаза (миграции, прогрев пула)
+    завершена, остановка не началась и БД отвечает.
+    """
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=503)
+    if not await check_database():
+        return JSONResponse({"status": "database unavailable"}, status_code=503)
+    return {"status": "ok"}
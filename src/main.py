@@ -1,16 +1,54 @@
-import subprocess
-
 from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from src.common.config import ARCHIVE_ENABLED, ARCHIVE_INTERVAL_MINUTES
+from src.common.database import prepare_database, replicas
+from src.common.events import event_hub
+from src.common.jwt_auth import password_executor
+from src.common.mailer import MailDispatcher
+from src.common.metrics import MetricsMiddleware
+from src.common.pomodoro_client import PomodoroClient
+from src.common.rate_limit import RateLimiter
+from src.common.sql_profiling import SQLProfilingMiddleware
+from src.health_router import health_router
+from src.metrics_router import metrics_router
 from src.routers import all_routers
+from src.task.service import archive_completed_tasks
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # subprocess.run("alembic upgrade head", shell=True, check=True)
+    app.state.ready = False
+    await prepare_database()
+    app.state.pomodoro_client = PomodoroClient()
+    app.state.mail_dispatcher = MailDispatcher()
+    app.state.mail_dispatcher.start()
+    app.state.rate_limiter = RateLimiter.from_config()
+    replicas.start()
+    await event_hub.start()
+    app.state.scheduler = AsyncIOScheduler()
+    if ARCHIVE_ENABLED:
+        # Один запуск за раз; пропущенные запуски схлопываются в один
+        app.state.scheduler.add_job(
+            archive_completed_tasks,
+            "interval",
+            minutes=ARCHIVE_INTERVAL_MINUTES,
+            max_instances=1,
+            coalesce=True,
+        )
+    app.state.scheduler.start()
+    app.state.ready = True
     yield
+    # Балансировщик перестаёт слать трафик, пока воркер останавливается
+    app.state.ready = False
+    app.state.scheduler.shutdown(wait=False)
+    await event_hub.stop()
+    await replicas.stop()
+    await app.state.mail_dispatcher.stop()
+    await app.state.pomodoro_client.aclose()
+    password_executor.shutdown(wait=False)
 
 
 app = FastAPI(
@@ -25,6 +63,8 @@ api = APIRouter(
 )
 
 
+app.add_middleware(SQLProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -43,3 +83,5 @@ for router in all_routers:
     api.include_router(router)
 
 app.include_router(api)
+app.include_router(metrics_router)
+app.include_router(health_router)
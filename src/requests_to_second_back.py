@@ -6,8 +6,13 @@ from src.task.schemas import CreateTaskSchema, UpdateTaskSchema, GetTaskSchema
 from src.task.dependencies import task_service
 from src.task.service import TaskService
 from src.common import jwt_auth
+from src.common.pomodoro_client import PomodoroClient, pomodoro_client
 from src.user.models import User
 
+# Роутер не подключён в src/routers.py (как и до появления PomodoroClient):
+# его POST /tasks и PATCH /tasks/{task_id}/complete совпадают с маршрутами
+# task_router. Пока он не подключён, PomodoroClient из приложения не
+# вызывается — ни circuit breaker, ни кэш чтений в работе не участвуют.
 pomodoro_router = APIRouter(
     prefix="/tasks",
     tags=["tasks"],
@@ -15,29 +20,19 @@ pomodoro_router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-SECOND_BACKEND_URL = "http://212.41.30.156:7000/pomodoro"
-
 
 @pomodoro_router.post("", response_model=GetTaskSchema)
 async def create_task(
     task_data: CreateTaskSchema,
     service: Annotated[TaskService, Depends(task_service)],
+    client: Annotated[PomodoroClient, Depends(pomodoro_client)],
     current_user: User = Depends(jwt_auth.get_current_user),
 ):
     try:
         task = await service.create_task(task_data, current_user.id)
 
         # Пример запроса ко второму бэкенду
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                f"{SECOND_BACKEND_URL}/start",
-                params={
-                    "userId": current_user.id,
-                    "taskId": task.id,
-                    "workMinutes": 25,
-                    "chillMinutes": 5,
-                },
-            )
+        await client.start_timer(current_user.id, task.id)
 
         return task
     except Exception as e:
@@ -49,17 +44,14 @@ async def create_task(
 async def mark_task_completed(
     task_id: int,
     service: Annotated[TaskService, Depends(task_service)],
+    client: Annotated[PomodoroClient, Depends(pomodoro_client)],
     current_user: User = Depends(jwt_auth.get_current_user),
 ):
     try:
         task = await service.mark_task_as_completed(task_id, current_user.id)
 
         # Запрос к другому бэкенду для остановки таймера
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                f"{SECOND_BACKEND_URL}/stop",
-                params={"userId": current_user.id, "taskId": task_id},
-            )
+        await client.stop_timer(current_user.id, task_id)
 
         return task
     except Exception as e:
@@ -69,16 +61,11 @@ async def mark_task_completed(
 
 @pomodoro_router.get("/pomodoro-info")
 async def get_pomodoro_info(
+    client: Annotated[PomodoroClient, Depends(pomodoro_client)],
     current_user: User = Depends(jwt_auth.get_current_user),
 ):
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{SECOND_BACKEND_URL}/get-started-pomodoro",
-                params={"userId": current_user.id},
-            )
-            response.raise_for_status()
-            return response.json()
+        return await client.get_started_pomodoro(current_user.id)
     except httpx.HTTPStatusError as e:
         logging.exception("Failed to fetch Pomodoro info")
         raise HTTPException(
@@ -88,16 +75,11 @@ async def get_pomodoro_info(
 
 @pomodoro_router.get("/pomodoro-stats")
 async def get_pomodoro_stats(
+    client: Annotated[PomodoroClient, Depends(pomodoro_client)],
     current_user: User = Depends(jwt_auth.get_current_user),
 ):
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{SECOND_BACKEND_URL}/get-pomodoro-stats",
-                params={"userId": current_user.id},
-            )
-            response.raise_for_status()
-            return response.json()
+        return await client.get_pomodoro_stats(current_user.id)
     except httpx.HTTPStatusError as e:
         logging.exception("Failed to fetch Pomodoro stats")
         raise HTTPException(
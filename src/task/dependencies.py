@@ -1,6 +1,9 @@
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.common.database import get_db_session
 from src.task.repository import TaskRepository
 from src.task.service import TaskService
 
-def task_service() -> TaskService:
-    return TaskService(TaskRepository())
+
+def task_service(session: AsyncSession = Depends(get_db_session)) -> TaskService:
+    return TaskService(TaskRepository(session))
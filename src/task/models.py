@@ -1,19 +1,60 @@
 from datetime import datetime
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.common.database import Base
 
+# Шаг между соседними rank: позволяет ~16 раз вставить задачу между двумя
+# соседями без перенумерации
+RANK_GAP = 1 << 16
+# Если после перемещения до соседа осталось меньше, ранги пользователя
+# перенумеровываются в фоне, не дожидаясь исчерпания промежутка
+RANK_REBALANCE_THRESHOLD = 16
+
+# Конфигурация 'simple' без стемминга: в задачах смешаны русский и английский
+SEARCH_CONFIG = "simple"
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+)
+
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        sa.Index("ix_tasks_user_id_priority_id", "user_id", "priority", "id"),
+        sa.Index("ix_tasks_user_id_rank_id", "user_id", "rank", "id"),
+        sa.Index(
+            "ix_tasks_user_id_rank_id_incomplete",
+            "user_id",
+            "rank",
+            "id",
+            postgresql_where=sa.text("NOT is_completed"),
+        ),
+        sa.Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        # Кандидаты в архив: завершённые задачи по времени последнего изменения
+        sa.Index(
+            "ix_tasks_updated_at_completed",
+            "updated_at",
+            postgresql_where=sa.text("is_completed"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(sa.Integer, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(sa.String(256), nullable=False)
     description: Mapped[str] = mapped_column(sa.Text, nullable=True)
     priority: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=1)
+    # Порядок задачи в списке пользователя, с промежутками RANK_GAP
+    rank: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
     is_completed: Mapped[bool] = mapped_column(
         sa.Boolean, nullable=False, default=False
     )
+    # Поддерживается самой БД (generated column); в обычные запросы не грузится
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+        deferred=True,
+    )
     # Новый внешний ключ для связи с пользователем
     user_id: Mapped[int] = mapped_column(
         sa.Integer, sa.ForeignKey("users.id"), nullable=False
@@ -30,3 +71,63 @@ class Task(Base):
 
     # Отношение с пользователем
     user = relationship("User", back_populates="tasks")
+
+
+class TaskStats(Base):
+    """
+    Счётчики задач пользователя. Обновляются приращениями в транзакциях
+    TaskRepository, поэтому чтение статистики — одна строка по ключу.
+    """
+
+    __tablename__ = "task_stats"
+
+    user_id: Mapped[int] = mapped_column(
+        sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    total: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0)
+    completed: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0)
+
+
+class TaskPriorityStats(Base):
+    """Гистограмма по приоритетам; пустые корзины удаляются."""
+
+    __tablename__ = "task_priority_stats"
+
+    user_id: Mapped[int] = mapped_column(
+        sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    priority: Mapped[int] = mapped_column(sa.Integer, primary_key=True)
+    total: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0)
+    completed: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0)
+
+
+class TaskArchive(Base):
+    """
+    Архив завершённых задач. Задачи переносятся сюда фоновой задачей
+    (см. archive_completed_tasks) с тем же id, чтобы горячая таблица tasks
+    и её индексы оставались размером с рабочий набор.
+    """
+
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        sa.Index("ix_tasks_archive_user_id_archived_at_id", "user_id", "archived_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(sa.Integer, primary_key=True, autoincrement=False)
+    title: Mapped[str] = mapped_column(sa.String(256), nullable=False)
+    description: Mapped[str] = mapped_column(sa.Text, nullable=True)
+    priority: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+    rank: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    is_completed: Mapped[bool] = mapped_column(sa.Boolean, nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False
+    )
+    archived_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
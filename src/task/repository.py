@@ -1,26 +1,614 @@
-from sqlalchemy import select, update, delete
-from src.task.models import Task
-from src.common.database import async_session_maker
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    and_,
+    bindparam,
+    delete,
+    func,
+    insert,
+    lambda_stmt,
+    literal,
+    or_,
+    select,
+    tuple_,
+    type_coerce,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from src.task.models import (
+    RANK_GAP,
+    SEARCH_CONFIG,
+    Task,
+    TaskArchive,
+    TaskPriorityStats,
+    TaskStats,
+)
+from src.user.models import User
+from src.common.database import note_write
+from src.common.pagination import DEFAULT_PAGE_SIZE, decode_cursor, split_page
 from src.common.repository import SQLAlchemyRepository
-from src.common.exceptions import ItemNotExist, TaskNotExist
+from src.common.exceptions import (
+    InvalidCursorException,
+    ItemNotExist,
+    TaskNotExist,
+)
 
 
 class TaskRepository(SQLAlchemyRepository):
+    """
+    Горячие запросы (find_one_by_id, find_by_status_and_priority,
+    update_one) собираются через lambda_stmt или кэш готовых конструкций:
+    select/update и ключ кэша компиляции не строятся заново на каждый вызов.
+    В лямбдах модель указана явно (Task), а не через self.model: SQLAlchemy
+    кэширует лямбду по месту в коде, значения берутся из её замыкания.
+    """
+
     model: type[Task] = Task
+    row_columns = (
+        Task.id,
+        Task.title,
+        Task.description,
+        Task.priority,
+        Task.is_completed,
+        Task.created_at,
+        Task.updated_at,
+    )
+    export_columns = (
+        Task.id,
+        Task.user_id,
+        Task.title,
+        Task.description,
+        Task.priority,
+        Task.is_completed,
+        Task.created_at,
+        Task.updated_at,
+    )
 
     async def find_one_by_id(self, task_id: int, user_id: int):
-        async with async_session_maker() as session:
-            stmt = select(self.model).where(
-                self.model.id == task_id, self.model.user_id == user_id
-            )
+        stmt = lambda_stmt(
+            lambda: select(Task).where(Task.id == task_id, Task.user_id == user_id)
+        )
+        async with self._read_session(user_id) as session:
             result = await session.execute(stmt)
             task = result.scalar_one_or_none()
             if task is None:
                 raise TaskNotExist()
             return task
 
+    async def create_with_next_priority(self, data: dict, user_id: int):
+        """
+        Создаёт задачу с приоритетом max(priority) + 1 в конце списка
+        (rank = max(rank) + RANK_GAP) одним INSERT. Транзакционная
+        advisory-блокировка по user_id сериализует параллельные создания
+        задач одного пользователя, поэтому приоритеты не дублируются;
+        оба MAX берутся по индексам (user_id, priority) и (user_id, rank).
+        """
+        async with self._session() as session:
+            await self._lock_user(session, user_id)
+            next_priority = (
+                select(func.coalesce(func.max(self.model.priority), 0) + 1)
+                .where(self.model.user_id == user_id)
+                .scalar_subquery()
+            )
+            next_rank = (
+                select(func.coalesce(func.max(self.model.rank), 0) + RANK_GAP)
+                .where(self.model.user_id == user_id)
+                .scalar_subquery()
+            )
+            stmt = (
+                insert(self.model)
+                .values(
+                    **data, user_id=user_id, priority=next_priority, rank=next_rank
+                )
+                .returning(self.model)
+            )
+            res = await session.execute(stmt)
+            task = res.scalar_one()
+            await self._apply_stats(
+                session, user_id, {task.priority: [1, int(task.is_completed)]}
+            )
+            await self._bump_version(session, user_id)
+            return task
+
+    async def move_one(
+        self,
+        task_id: int,
+        user_id: int,
+        before_id: int | None = None,
+        after_id: int | None = None,
+    ) -> tuple[Task, int]:
+        """
+        Ставит задачу сразу перед before_id или сразу после after_id,
+        меняя rank одной строки на середину промежутка между соседями.
+        Если промежутка не осталось, ранги пользователя перенумеровываются
+        в этой же транзакции. Возвращает задачу и оставшийся минимальный
+        промежуток до соседей — по нему сервис решает, пора ли фоновая
+        перенумерация.
+        """
+        anchor_id = before_id if before_id is not None else after_id
+        async with self._session() as session:
+            await self._lock_user(session, user_id)
+            for attempt in range(2):
+                res = await session.execute(
+                    select(self.model.id, self.model.rank).where(
+                        self.model.user_id == user_id,
+                        self.model.id.in_((task_id, anchor_id)),
+                    )
+                )
+                ranks = dict(res.tuples().all())
+                if task_id not in ranks or anchor_id not in ranks:
+                    raise TaskNotExist()
+                anchor_rank = ranks[anchor_id]
+                neighbour_rank = await self._neighbour_rank(
+                    session, user_id, task_id, anchor_id, anchor_rank, after_id is not None
+                )
+                if neighbour_rank is None:
+                    new_rank = anchor_rank + (
+                        RANK_GAP if after_id is not None else -RANK_GAP
+                    )
+                    gap = RANK_GAP
+                else:
+                    low, high = sorted((anchor_rank, neighbour_rank))
+                    new_rank = (low + high) // 2
+                    gap = min(new_rank - low, high - new_rank)
+                if gap > 0:
+                    break
+                await self._rebalance(session, user_id)
+            stmt = (
+                update(self.model)
+                .where(self.model.id == task_id, self.model.user_id == user_id)
+                .values(rank=new_rank)
+                .returning(self.model)
+            )
+            # Задача загружается через ORM SELECT, как в _update_statement
+            res = await session.execute(
+                select(self.model)
+                .from_statement(stmt)
+                .execution_options(populate_existing=True)
+            )
+            task = res.scalar_one()
+            await self._bump_version(session, user_id)
+            return task, gap
+
+    async def rebalance_ranks(self, user_id: int) -> None:
+        async with self._session() as session:
+            await self._lock_user(session, user_id)
+            await self._rebalance(session, user_id)
+
+    async def _neighbour_rank(
+        self,
+        session,
+        user_id: int,
+        task_id: int,
+        anchor_id: int,
+        anchor_rank: int,
+        after: bool,
+    ) -> int | None:
+        """rank ближайшей задачи после (after) или перед якорем, кроме task_id."""
+        position = tuple_(self.model.rank, self.model.id)
+        anchor = tuple_(anchor_rank, anchor_id)
+        stmt = select(self.model.rank).where(
+            self.model.user_id == user_id, self.model.id != task_id
+        )
+        if after:
+            stmt = stmt.where(position > anchor).order_by(
+                self.model.rank.asc(), self.model.id.asc()
+            )
+        else:
+            stmt = stmt.where(position < anchor).order_by(
+                self.model.rank.desc(), self.model.id.desc()
+            )
+        res = await session.execute(stmt.limit(1))
+        return res.scalar_one_or_none()
+
+    async def _rebalance(self, session, user_id: int) -> None:
+        """Перенумеровывает ранги пользователя с шагом RANK_GAP, сохраняя порядок."""
+        positions = (
+            select(
+                self.model.id,
+                func.row_number()
+                .over(order_by=(self.model.rank, self.model.id))
+                .label("position"),
+            )
+            .where(self.model.user_id == user_id)
+            .subquery()
+        )
+        await session.execute(
+            update(self.model)
+            .where(self.model.id == positions.c.id, self.model.user_id == user_id)
+            # rank — служебное поле, updated_at задачи не меняется
+            .values(
+                rank=positions.c.position * RANK_GAP,
+                updated_at=self.model.updated_at,
+            )
+        )
+
+    @staticmethod
+    async def _lock_user(session, user_id: int) -> None:
+        # Сериализует изменения порядка задач одного пользователя до конца
+        # транзакции. Берётся первой, до любых блокировок строк пользователя
+        await session.execute(select(func.pg_advisory_xact_lock(user_id)))
+
+    @classmethod
+    async def _bump_version(cls, session, user_id: int) -> None:
+        """
+        Увеличивает users.tasks_version в транзакции изменения задач:
+        откат изменения откатывает и версию. Вызывается всеми путями записи,
+        поэтому здесь же пользователь отмечается для read-your-writes.
+        """
+        await cls._bump_versions(session, [user_id])
+
+    @staticmethod
+    async def _bump_versions(session, user_ids: list[int]) -> None:
+        """_bump_version сразу для нескольких пользователей одним UPDATE."""
+        await session.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            # Версия — служебное поле, updated_at пользователя не меняется
+            .values(tasks_version=User.tasks_version + 1, updated_at=User.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        for user_id in user_ids:
+            note_write(session, user_id)
+
+    async def get_version(self, user_id: int) -> int:
+        """Текущая версия задач пользователя; читается по первичному ключу users."""
+        async with self._read_session(user_id) as session:
+            res = await session.execute(
+                select(User.tasks_version).where(User.id == user_id)
+            )
+            return res.scalar_one()
+
+    @staticmethod
+    def _count(deltas: dict, priority: int, is_completed: bool, sign: int) -> None:
+        bucket = deltas.setdefault(priority, [0, 0])
+        bucket[0] += sign
+        bucket[1] += sign * int(is_completed)
+
+    @staticmethod
+    async def _apply_stats(session, user_id: int, deltas: dict) -> None:
+        """
+        Прибавляет приращения {priority: [total, completed]} к счётчикам
+        пользователя. Строка task_stats обновляется всегда и первой: её
+        блокировка сериализует все изменения счётчиков пользователя, в том
+        числе с пересчётом rebuild_stats; корзины — в порядке приоритета.
+        """
+        deltas = {p: d for p, d in sorted(deltas.items()) if d != [0, 0]}
+        if not deltas:
+            return
+        stmt = pg_insert(TaskStats).values(
+            user_id=user_id,
+            total=sum(d[0] for d in deltas.values()),
+            completed=sum(d[1] for d in deltas.values()),
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[TaskStats.user_id],
+                set_={
+                    "total": TaskStats.total + stmt.excluded.total,
+                    "completed": TaskStats.completed + stmt.excluded.completed,
+                },
+            )
+        )
+        stmt = pg_insert(TaskPriorityStats).values(
+            [
+                {"user_id": user_id, "priority": p, "total": d[0], "completed": d[1]}
+                for p, d in deltas.items()
+            ]
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[TaskPriorityStats.user_id, TaskPriorityStats.priority],
+                set_={
+                    "total": TaskPriorityStats.total + stmt.excluded.total,
+                    "completed": TaskPriorityStats.completed + stmt.excluded.completed,
+                },
+            )
+        )
+        await session.execute(
+            delete(TaskPriorityStats).where(
+                TaskPriorityStats.user_id == user_id,
+                TaskPriorityStats.priority.in_(deltas),
+                TaskPriorityStats.total == 0,
+            )
+        )
+
+    async def get_stats(self, user_id: int) -> dict:
+        """Статистика пользователя из счётчиков, без обращения к tasks."""
+        async with self._read_session(user_id) as session:
+            res = await session.execute(
+                select(TaskStats.total, TaskStats.completed).where(
+                    TaskStats.user_id == user_id
+                )
+            )
+            total, completed = res.one_or_none() or (0, 0)
+            res = await session.execute(
+                select(
+                    TaskPriorityStats.priority,
+                    TaskPriorityStats.total,
+                    TaskPriorityStats.completed,
+                )
+                .where(TaskPriorityStats.user_id == user_id)
+                .order_by(TaskPriorityStats.priority)
+            )
+            return {
+                "total": total,
+                "completed": completed,
+                "pending": total - completed,
+                "by_priority": [row._asdict() for row in res],
+            }
+
+    async def rebuild_stats(self, user_id: int) -> None:
+        """
+        Пересчитывает счётчики пользователя по таблицам tasks и
+        tasks_archive (архивные задачи в статистике учитываются). Сначала
+        блокируется строка task_stats: изменения, уже учтённые в счётчиках,
+        к этому моменту закоммичены и попадут в пересчёт, а новые дождутся
+        его конца и прибавятся к пересчитанным значениям.
+        """
+        async with self._session() as session:
+            stmt = pg_insert(TaskStats).values(user_id=user_id, total=0, completed=0)
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[TaskStats.user_id],
+                    set_={"total": TaskStats.total},
+                )
+            )
+            rows = union_all(
+                select(self.model.priority, self.model.is_completed).where(
+                    self.model.user_id == user_id
+                ),
+                select(TaskArchive.priority, TaskArchive.is_completed).where(
+                    TaskArchive.user_id == user_id
+                ),
+            ).subquery()
+            counts = select(
+                func.count(), func.count().filter(rows.c.is_completed)
+            ).subquery()
+            await session.execute(
+                update(TaskStats)
+                .where(TaskStats.user_id == user_id)
+                .values(
+                    total=select(counts.c[0]).scalar_subquery(),
+                    completed=select(counts.c[1]).scalar_subquery(),
+                )
+            )
+            await session.execute(
+                delete(TaskPriorityStats).where(TaskPriorityStats.user_id == user_id)
+            )
+            await session.execute(
+                insert(TaskPriorityStats).from_select(
+                    ["user_id", "priority", "total", "completed"],
+                    select(
+                        literal(user_id),
+                        rows.c.priority,
+                        func.count(),
+                        func.count().filter(rows.c.is_completed),
+                    ).group_by(rows.c.priority),
+                )
+            )
+
+    async def find_stats_user_ids(self) -> list[int]:
+        """Пользователи, у которых есть задачи (в том числе архивные) или счётчики."""
+        async with self._session() as session:
+            res = await session.execute(
+                select(self.model.user_id).union(
+                    select(TaskArchive.user_id), select(TaskStats.user_id)
+                )
+            )
+            return sorted(res.scalars())
+
+    # (изменяемые колонки, с проверкой владельца) -> готовый UPDATE;
+    # вариантов не больше 2 ** (число колонок UpdateTaskSchema) * 2
+    _update_statements: dict[tuple[frozenset, bool], object] = {}
+
+    @classmethod
+    def _update_statement(cls, columns: frozenset, by_owner: bool):
+        key = (columns, by_owner)
+        stmt = cls._update_statements.get(key)
+        if stmt is not None:
+            return stmt
+        criteria = [Task.id == bindparam("task_id")]
+        if by_owner:
+            criteria.append(Task.user_id == bindparam("owner_id"))
+        old = (
+            select(Task.id, Task.priority, Task.is_completed)
+            .where(*criteria)
+            .with_for_update()
+            .subquery("old")
+        )
+        # Имена параметров не совпадают с именами колонок: их SQLAlchemy
+        # резервирует под SET
+        stmt = (
+            update(Task)
+            .where(Task.id == old.c.id)
+            .values(
+                {
+                    name: bindparam(f"new_{name}", type_=Task.__table__.c[name].type)
+                    for name in columns
+                }
+            )
+            .returning(Task, old.c.priority, old.c.is_completed)
+        )
+        # Задача загружается через ORM SELECT, а не как результат ORM UPDATE:
+        # при повторном выполнении из кэша компиляции ORM UPDATE ... RETURNING
+        # сопоставляет колонки по позиции и сбивается на отложенной
+        # search_vector (user_id получал created_at). populate_existing —
+        # чтобы уже загруженная в сессию задача получила новые значения
+        stmt = (
+            select(Task, old.c.priority, old.c.is_completed)
+            .from_statement(stmt)
+            .execution_options(populate_existing=True)
+        )
+        cls._update_statements[key] = stmt
+        return stmt
+
+    async def _update_counted(
+        self, session, values: dict, task_id: int, user_id: int | None = None
+    ):
+        """
+        UPDATE одной задачи (только своей, если задан user_id), возвращающий
+        её прежние priority и is_completed для счётчиков: старая версия
+        строки читается FOR UPDATE в том же запросе. Возвращает обновлённую
+        задачу или None.
+        """
+        stmt = self._update_statement(frozenset(values), user_id is not None)
+        params = {f"new_{name}": value for name, value in values.items()}
+        params["task_id"] = task_id
+        if user_id is not None:
+            params["owner_id"] = user_id
+        res = await session.execute(stmt, params)
+        row = res.one_or_none()
+        if row is None:
+            return None
+        task, old_priority, old_completed = row
+        deltas: dict = {}
+        self._count(deltas, old_priority, old_completed, -1)
+        self._count(deltas, task.priority, task.is_completed, 1)
+        await self._apply_stats(session, task.user_id, deltas)
+        return task
+
+    async def bulk_apply(
+        self, operations: list[tuple[str, int | None, dict]], user_id: int
+    ) -> list[dict]:
+        """
+        Применяет пачку операций (op, task_id, data) одной транзакцией.
+        Операции группируются по типу и выполняются фазами
+        create -> update -> complete -> delete, каждая фаза — один
+        многострочный INSERT/UPDATE/DELETE. Возвращает результат на каждую
+        операцию в исходном порядке; чужие и несуществующие задачи дают
+        ошибку только своей операции.
+        """
+        results: list[dict] = [
+            {"index": index, "op": op, "ok": True, "task_id": task_id}
+            for index, (op, task_id, _) in enumerate(operations)
+        ]
+        creates = [i for i, (op, _, _) in enumerate(operations) if op == "create"]
+        referenced = {
+            task_id for op, task_id, _ in operations if op != "create"
+        }
+        async with self._session() as session:
+            # Advisory-блокировка пользователя берётся до блокировок строк,
+            # как в move_one/rebalance_ranks/create_with_next_priority:
+            # при обратном порядке пачка и перемещение взаимоблокируются
+            await self._lock_user(session, user_id)
+            # Исходное состояние затронутых задач для счётчиков; строки
+            # блокируются в порядке id, чтобы параллельные пачки не взаимоблокировались
+            initial: dict[int, tuple[int, bool]] = {}
+            if referenced:
+                res = await session.execute(
+                    select(self.model.id, self.model.priority, self.model.is_completed)
+                    .where(
+                        self.model.user_id == user_id, self.model.id.in_(referenced)
+                    )
+                    .order_by(self.model.id)
+                    .with_for_update()
+                )
+                initial = {task_id: state for task_id, *state in res}
+            owned = set(initial)
+            deltas: dict = {}
+            for result in results:
+                if result["op"] != "create" and result["task_id"] not in owned:
+                    result.update(ok=False, detail="Task not found")
+
+            if creates:
+                res = await session.execute(
+                    select(
+                        func.coalesce(func.max(self.model.priority), 0),
+                        func.coalesce(func.max(self.model.rank), 0),
+                    ).where(self.model.user_id == user_id)
+                )
+                max_priority, max_rank = res.one()
+                rows = [
+                    {
+                        **operations[i][2],
+                        "user_id": user_id,
+                        "priority": max_priority + n,
+                        "rank": max_rank + n * RANK_GAP,
+                    }
+                    for n, i in enumerate(creates, start=1)
+                ]
+                res = await session.execute(
+                    insert(self.model).returning(
+                        self.model, sort_by_parameter_order=True
+                    ),
+                    rows,
+                )
+                for i, task in zip(creates, res.scalars()):
+                    results[i].update(task_id=task.id, task=task)
+                    self._count(deltas, task.priority, task.is_completed, 1)
+
+            # UPDATE по первичному ключу группами с одинаковым набором колонок
+            updates: dict[frozenset, list[dict]] = {}
+            for result, (op, task_id, data) in zip(results, operations):
+                if op == "update" and result["ok"] and data:
+                    updates.setdefault(frozenset(data), []).append(
+                        {"id": task_id, **data}
+                    )
+            for rows in updates.values():
+                await session.execute(update(self.model), rows)
+
+            completed = [
+                r["task_id"] for r in results if r["op"] == "complete" and r["ok"]
+            ]
+            if completed:
+                await session.execute(
+                    update(self.model)
+                    .where(self.model.user_id == user_id, self.model.id.in_(completed))
+                    .values(is_completed=True)
+                )
+
+            deleted = [r["task_id"] for r in results if r["op"] == "delete" and r["ok"]]
+            if deleted:
+                await session.execute(
+                    delete(self.model).where(
+                        self.model.user_id == user_id, self.model.id.in_(deleted)
+                    )
+                )
+
+            changed = {
+                r["task_id"]
+                for r in results
+                if r["op"] in ("update", "complete") and r["ok"]
+            }
+            tasks: dict[int, Task] = {}
+            if changed:
+                res = await session.execute(
+                    select(self.model)
+                    .where(self.model.id.in_(changed))
+                    .execution_options(populate_existing=True)
+                )
+                tasks = {task.id: task for task in res.scalars()}
+                for result in results:
+                    if result["op"] in ("update", "complete") and result["ok"]:
+                        result["task"] = tasks.get(result["task_id"])
+
+            # Счётчики: итоговое состояние затронутых задач минус исходное
+            touched = {r["task_id"] for r in results if r["op"] != "create" and r["ok"]}
+            for task_id in touched:
+                self._count(deltas, *initial[task_id], -1)
+                task = tasks.get(task_id)
+                if task is not None:
+                    self._count(deltas, task.priority, task.is_completed, 1)
+            await self._apply_stats(session, user_id, deltas)
+            if any(result["ok"] for result in results):
+                await self._bump_version(session, user_id)
+        return results
+
+    def stream_export(
+        self, user_id: int | None = None, is_completed: bool | None = None
+    ):
+        criteria = []
+        if user_id is not None:
+            criteria.append(self.model.user_id == user_id)
+        if is_completed is not None:
+            criteria.append(self.model.is_completed.is_(is_completed))
+        return self.stream_rows(self.export_columns, *criteria)
+
     async def find_by_user(self, user_id: int):
-        async with async_session_maker() as session:
+        async with self._read_session(user_id) as session:
             stmt = select(self.model).where(self.model.user_id == user_id)
             result = await session.execute(stmt)
             return result.scalars().all()
@@ -30,53 +618,231 @@ class TaskRepository(SQLAlchemyRepository):
         user_id: int,
         is_completed: bool | None = None,
         priority: int | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        as_rows: bool = False,
     ):
-        async with async_session_maker() as session:
-            stmt = select(self.model).where(self.model.user_id == user_id)
-            if is_completed is not None:
-                stmt = stmt.where(self.model.is_completed == is_completed)
-            if priority is not None:
-                stmt = stmt.where(self.model.priority == priority)
-            stmt = stmt.order_by(self.model.priority.asc())  # сортировка по приоритету
+        """
+        Страница задач пользователя в порядке списка (rank, id):
+        (задачи, курсор следующей страницы). as_rows — строки row_columns
+        (с rank в конце для курсора) вместо ORM-объектов.
+        """
+        if as_rows:
+            stmt = lambda_stmt(
+                lambda: select(*TaskRepository.row_columns, Task.rank).where(
+                    Task.user_id == user_id
+                )
+            )
+        else:
+            stmt = lambda_stmt(lambda: select(Task).where(Task.user_id == user_id))
+        # IS true/false рендерится литералом, а не параметром, чтобы
+        # планировщик мог выбрать частичный индекс незавершённых задач;
+        # поэтому это две разные лямбды, а не одна с is_completed в замыкании
+        if is_completed is True:
+            stmt += lambda s: s.where(Task.is_completed.is_(True))
+        elif is_completed is False:
+            stmt += lambda s: s.where(Task.is_completed.is_(False))
+        if priority is not None:
+            stmt += lambda s: s.where(Task.priority == priority)
+        if cursor is not None:
+            last_rank, last_id = decode_cursor(cursor, 2)
+            stmt += lambda s: s.where(
+                tuple_(Task.rank, Task.id)
+                > tuple_(type_coerce(last_rank, BigInteger), last_id)
+            )
+        fetch = limit + 1
+        # порядок списка, задаётся перемещением задач
+        stmt += lambda s: s.order_by(Task.rank.asc(), Task.id.asc()).limit(fetch)
+        async with self._read_session(user_id) as session:
             result = await session.execute(stmt)
-            return result.scalars().all()
+            items = result.all() if as_rows else result.scalars()
+            return split_page(items, limit, lambda task: (task.rank, task.id))
 
-    async def update_one(self, task_id: int, data: dict, user_id: int):
-        async with async_session_maker() as session:
+    async def search(
+        self,
+        user_id: int,
+        query: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        """
+        Полнотекстовый поиск по title/description через GIN-индекс
+        search_vector. Страница в порядке убывания релевантности, курсор
+        (релевантность, id).
+        """
+        async with self._read_session(user_id) as session:
+            ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+            score = func.ts_rank(self.model.search_vector, ts_query)
             stmt = (
-                update(self.model)
-                .where(self.model.id == task_id, self.model.user_id == user_id)
-                .values(**data)
-                .returning(self.model)
+                select(self.model, score.label("score"))
+                .where(
+                    self.model.user_id == user_id,
+                    self.model.search_vector.bool_op("@@")(ts_query),
+                )
+                .order_by(score.desc(), self.model.id.asc())
             )
-            res = await session.execute(stmt)
-            await session.commit()
-            row = res.scalar_one_or_none()
+            if cursor is not None:
+                last_score, last_id = decode_cursor(cursor, 2)
+                stmt = stmt.where(
+                    or_(
+                        score < last_score,
+                        and_(score == last_score, self.model.id > last_id),
+                    )
+                )
+            result = await session.execute(stmt.limit(limit + 1))
+            items, next_cursor = split_page(
+                result.all(), limit, lambda row: (row.score, row.Task.id)
+            )
+            return [row.Task for row in items], next_cursor
+
+    async def update_one(self, task_id: int, data: dict, user_id: int):
+        async with self._session() as session:
+            row = await self._update_counted(session, data, task_id, user_id)
             if row is None:
                 raise ItemNotExist("Task not found")
+            await self._bump_version(session, user_id)
             return row
 
     async def delete_one(self, task_id: int, user_id: int):
-        async with async_session_maker() as session:
-            stmt = delete(self.model).where(
-                self.model.id == task_id, self.model.user_id == user_id
+        async with self._session() as session:
+            stmt = (
+                delete(self.model)
+                .where(self.model.id == task_id, self.model.user_id == user_id)
+                .returning(self.model.priority, self.model.is_completed)
             )
             res = await session.execute(stmt)
-            await session.commit()
-            if res.rowcount == 0:
+            row = res.one_or_none()
+            if row is None:
                 raise ItemNotExist("Task not found")
+            deltas: dict = {}
+            self._count(deltas, row.priority, row.is_completed, -1)
+            await self._apply_stats(session, user_id, deltas)
+            await self._bump_version(session, user_id)
 
     async def admin_update_one(self, task_id: int, data: dict):
-        async with async_session_maker() as session:
-            stmt = (
-                update(self.model)
-                .where(self.model.id == task_id)
-                .values(**data)
-                .returning(self.model)
-            )
-            res = await session.execute(stmt)
-            await session.commit()
-            row = res.scalar_one_or_none()
+        async with self._session() as session:
+            row = await self._update_counted(session, data, task_id)
             if row is None:
                 raise ItemNotExist("Task not found")
+            await self._bump_version(session, row.user_id)
             return row
+
+    async def archive_batch(
+        self, cutoff: datetime, batch_size: int
+    ) -> dict[int, list[int]]:
+        """
+        Переносит до batch_size задач, завершённых раньше cutoff, из tasks
+        в tasks_archive одним запросом: DELETE ... RETURNING в CTE и INSERT
+        из него. Кандидаты берутся по частичному индексу завершённых задач
+        с SKIP LOCKED: задачи, которые сейчас меняет пользователь, дождутся
+        следующего запуска. Счётчики статистики не меняются. Возвращает
+        {user_id: [id перенесённых задач]}.
+        """
+        columns = [
+            column.key
+            for column in TaskArchive.__table__.columns
+            if column.key != "archived_at"
+        ]
+        candidates = (
+            select(self.model.id)
+            # Условие дословно как у частичного индекса: IS true он не покрывает
+            .where(self.model.is_completed, self.model.updated_at < cutoff)
+            .order_by(self.model.updated_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        moved = (
+            delete(self.model)
+            .where(self.model.id.in_(candidates))
+            .returning(*(getattr(self.model, name) for name in columns))
+            .cte("moved")
+        )
+        async with self._session() as session:
+            res = await session.execute(
+                insert(TaskArchive)
+                .from_select(columns, select(*(moved.c[name] for name in columns)))
+                .returning(TaskArchive.user_id, TaskArchive.id)
+            )
+            archived: dict[int, list[int]] = {}
+            for user_id, task_id in res:
+                archived.setdefault(user_id, []).append(task_id)
+            if archived:
+                await self._bump_versions(session, sorted(archived))
+            return archived
+
+    async def find_archived(
+        self,
+        user_id: int,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        """
+        Страница архивных задач пользователя, недавно архивированные
+        первыми: (задачи, курсор (archived_at, id)).
+        """
+        async with self._read_session(user_id) as session:
+            stmt = (
+                select(TaskArchive)
+                .where(TaskArchive.user_id == user_id)
+                .order_by(TaskArchive.archived_at.desc(), TaskArchive.id.desc())
+            )
+            if cursor is not None:
+                archived_at, last_id = decode_cursor(cursor, 2)
+                try:
+                    archived_at = datetime.fromisoformat(archived_at)
+                except (TypeError, ValueError):
+                    raise InvalidCursorException()
+                stmt = stmt.where(
+                    tuple_(TaskArchive.archived_at, TaskArchive.id)
+                    < tuple_(archived_at, last_id)
+                )
+            result = await session.execute(stmt.limit(limit + 1))
+            return split_page(
+                result.scalars(), limit, lambda task: (task.archived_at, task.id)
+            )
+
+    async def restore_one(self, task_id: int, user_id: int) -> Task:
+        """
+        Возвращает задачу из архива в tasks с тем же id в конец списка
+        пользователя. updated_at обновляется, иначе следующий запуск архива
+        сразу перенёс бы задачу обратно. Счётчики статистики не меняются.
+        """
+        columns = [
+            "id",
+            "title",
+            "description",
+            "priority",
+            "is_completed",
+            "user_id",
+            "created_at",
+        ]
+        async with self._session() as session:
+            await self._lock_user(session, user_id)
+            next_rank = (
+                select(func.coalesce(func.max(self.model.rank), 0) + RANK_GAP)
+                .where(self.model.user_id == user_id)
+                .scalar_subquery()
+            )
+            restored = (
+                delete(TaskArchive)
+                .where(TaskArchive.id == task_id, TaskArchive.user_id == user_id)
+                .returning(*(getattr(TaskArchive, name) for name in columns))
+                .cte("restored")
+            )
+            res = await session.execute(
+                insert(self.model)
+                .from_select(
+                    [*columns, "rank", "updated_at"],
+                    select(
+                        *(restored.c[name] for name in columns),
+                        next_rank,
+                        func.now(),
+                    ),
+                )
+                .returning(self.model)
+            )
+            task = res.scalar_one_or_none()
+            if task is None:
+                raise TaskNotExist()
+            await self._bump_version(session, user_id)
+            return task
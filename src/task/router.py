@@ -1,9 +1,32 @@
 import logging
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException
-from src.task.schemas import CreateTaskSchema, UpdateTaskSchema, GetTaskSchema
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from src.common.config import FAST_JSON_RESPONSES
+from src.common.etag import etag_matches
+from src.common.events import event_hub
+from src.common.fast_json import rows_page_response
+from src.common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
+from src.task.schemas import (
+    ArchivedTaskSchema,
+    BulkTaskRequestSchema,
+    BulkTaskResultSchema,
+    CreateTaskSchema,
+    UpdateTaskSchema,
+    GetTaskSchema,
+    MoveTaskSchema,
+    TaskStatsSchema,
+)
 from src.task.dependencies import task_service
-from src.task.service import TaskService
+from src.task.service import TaskService, rebalance_task_ranks
 from src.common import jwt_auth
 from src.user.models import User  # Предполагаем, что модель User импортируется отсюда
 
@@ -15,13 +38,97 @@ task_router = APIRouter(
 )
 
 
+@task_router.get("/search", response_model=Page[GetTaskSchema])
+async def search_tasks(
+    service: Annotated[TaskService, Depends(task_service)],
+    q: Annotated[str, Query(min_length=1, max_length=256)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    current_user: User = Depends(jwt_auth.get_current_user),
+):
+    """Поиск по названию и описанию задач пользователя, по релевантности."""
+    try:
+        return await service.search_tasks(current_user.id, q, limit, cursor)
+    except Exception as e:
+        logging.exception(f"Error searching tasks: {e}")
+        raise HTTPException(status_code=400, detail="Error searching tasks")
+
+
+@task_router.get("/events", response_class=StreamingResponse)
+async def task_events(current_user: User = Depends(jwt_auth.get_current_user)):
+    """
+    Живые изменения задач пользователя (Server-Sent Events): task.created,
+    task.updated, task.completed, task.moved, task.deleted, task.restored,
+    tasks.archived. На tasks.archived, resync и dropped клиент должен
+    перечитать список.
+    """
+    return StreamingResponse(
+        event_hub.stream(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@task_router.get("/stats", response_model=TaskStatsSchema)
+async def get_task_stats(
+    service: Annotated[TaskService, Depends(task_service)],
+    current_user: User = Depends(jwt_auth.get_current_user),
+):
+    """Счётчики задач пользователя и гистограмма по приоритетам."""
+    try:
+        return await service.get_stats(current_user.id)
+    except Exception as e:
+        logging.exception(f"Error getting task stats: {e}")
+        raise HTTPException(status_code=400, detail="Error getting task stats")
+
+
+@task_router.get("/archive", response_model=Page[ArchivedTaskSchema])
+async def get_archived_tasks(
+    service: Annotated[TaskService, Depends(task_service)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    current_user: User = Depends(jwt_auth.get_current_user),
+):
+    """Архивные задачи пользователя, недавно архивированные первыми."""
+    try:
+        return await service.get_archived_tasks(current_user.id, limit, cursor)
+    except Exception as e:
+        logging.exception(f"Error getting archived tasks: {e}")
+        raise HTTPException(status_code=400, detail="Error getting archived tasks")
+
+
+@task_router.post("/archive/{task_id}/restore", response_model=GetTaskSchema)
+async def restore_task(
+    task_id: int,
+    service: Annotated[TaskService, Depends(task_service)],
+    current_user: User = Depends(jwt_auth.get_current_user),
+):
+    """Возвращает задачу из архива в конец списка."""
+    try:
+        return await service.restore_task(task_id, current_user.id)
+    except Exception as e:
+        logging.exception(f"Error restoring task {task_id}: {e}")
+        raise HTTPException(status_code=404, detail="Task not found")
+
+
+# Кэш клиента хранит ответ, но перепроверяет его по ETag при каждом запросе
+TASKS_CACHE_CONTROL = "private, no-cache"
+
+
 @task_router.get("/{task_id}", response_model=GetTaskSchema)
 async def get_task_by_id(
     task_id: int,
+    response: Response,
     service: Annotated[TaskService, Depends(task_service)],
+    if_none_match: Annotated[str | None, Header()] = None,
     current_user: User = Depends(jwt_auth.get_current_user),
 ):
     try:
+        etag = await service.get_tasks_etag(current_user.id)
+        headers = {"ETag": etag, "Cache-Control": TASKS_CACHE_CONTROL}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
         return await service.get_task_by_id(task_id, current_user.id)
     except Exception as e:
         logging.exception(f"Error getting task {task_id}: {e}")
@@ -41,6 +148,23 @@ async def create_task(
         raise HTTPException(status_code=400, detail="Error creating task")
 
 
+@task_router.post("/bulk", response_model=list[BulkTaskResultSchema])
+async def bulk_tasks(
+    bulk_data: BulkTaskRequestSchema,
+    service: Annotated[TaskService, Depends(task_service)],
+    current_user: User = Depends(jwt_auth.get_current_user),
+):
+    """
+    Пачка операций create/update/complete/delete одной транзакцией.
+    Операции выполняются фазами в порядке create, update, complete, delete.
+    """
+    try:
+        return await service.bulk_apply(bulk_data.operations, current_user.id)
+    except Exception as e:
+        logging.exception(f"Error applying bulk task operations: {e}")
+        raise HTTPException(status_code=400, detail="Error applying bulk operations")
+
+
 @task_router.put("/{task_id}", response_model=GetTaskSchema)
 async def update_task(
     task_id: int,
@@ -55,6 +179,27 @@ async def update_task(
         raise HTTPException(status_code=400, detail="Error updating task")
 
 
+@task_router.patch("/{task_id}/move", response_model=GetTaskSchema)
+async def move_task(
+    task_id: int,
+    move_data: MoveTaskSchema,
+    background_tasks: BackgroundTasks,
+    service: Annotated[TaskService, Depends(task_service)],
+    current_user: User = Depends(jwt_auth.get_current_user),
+):
+    """Ставит задачу перед before_id или после after_id; меняется одна строка."""
+    try:
+        task, needs_rebalance = await service.move_task(
+            task_id, move_data, current_user.id
+        )
+    except Exception as e:
+        logging.exception(f"Error moving task {task_id}: {e}")
+        raise HTTPException(status_code=400, detail="Error moving task")
+    if needs_rebalance:
+        background_tasks.add_task(rebalance_task_ranks, current_user.id)
+    return task
+
+
 @task_router.delete("/{task_id}")
 async def delete_task(
     task_id: int,
@@ -81,15 +226,40 @@ async def mark_task_completed(
         raise HTTPException(status_code=400, detail="Error marking task as completed")
 
 
-@task_router.get("", response_model=list[GetTaskSchema])
+@task_router.get("", response_model=Page[GetTaskSchema])
 async def list_tasks(
+    response: Response,
     service: Annotated[TaskService, Depends(task_service)],
     is_completed: bool | None = None,
     priority: int | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
     current_user: User = Depends(jwt_auth.get_current_user),
 ):
+    """
+    Отвечает 304 Not Modified, если If-None-Match совпадает с версией
+    задач пользователя: проверка — одно чтение строки users по ключу.
+    """
     try:
-        return await service.get_tasks(current_user.id, is_completed, priority)
+        etag = await service.get_tasks_etag(current_user.id)
+        headers = {"ETag": etag, "Cache-Control": TASKS_CACHE_CONTROL}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        page = await service.get_tasks(
+            current_user.id,
+            is_completed,
+            priority,
+            limit,
+            cursor,
+            as_rows=FAST_JSON_RESPONSES,
+        )
+        if FAST_JSON_RESPONSES:
+            return rows_page_response(
+                page, service.task_repository.row_columns, headers
+            )
+        response.headers.update(headers)
+        return page
     except Exception as e:
         logging.exception(f"Error listing tasks: {e}")
         raise HTTPException(status_code=400, detail="Error listing tasks")
@@ -1,5 +1,6 @@
 from datetime import datetime
-from pydantic import Field
+from typing import Literal
+from pydantic import Field, model_validator
 
 from src.common.schema import BaseSchema
 
@@ -24,3 +25,61 @@ class GetTaskSchema(BaseSchema):
     is_completed: bool
     created_at: datetime
     updated_at: datetime
+
+
+class ArchivedTaskSchema(GetTaskSchema):
+    archived_at: datetime
+
+
+class MoveTaskSchema(BaseSchema):
+    before_id: int | None = Field(None)
+    after_id: int | None = Field(None)
+
+    @model_validator(mode="after")
+    def validate_anchor(self):
+        if (self.before_id is None) == (self.after_id is None):
+            raise ValueError("Exactly one of before_id and after_id is required")
+        return self
+
+
+class BulkTaskOperationSchema(BaseSchema):
+    op: Literal["create", "update", "complete", "delete"]
+    task_id: int | None = Field(None)
+    data: UpdateTaskSchema | None = Field(None)
+
+    @model_validator(mode="after")
+    def validate_operation(self):
+        if self.op == "create":
+            if self.data is None or not self.data.title:
+                raise ValueError("create operation requires data.title")
+        elif self.task_id is None:
+            raise ValueError(f"{self.op} operation requires task_id")
+        if self.op == "update" and self.data is None:
+            raise ValueError("update operation requires data")
+        return self
+
+
+class BulkTaskRequestSchema(BaseSchema):
+    operations: list[BulkTaskOperationSchema] = Field(..., min_length=1, max_length=500)
+
+
+class BulkTaskResultSchema(BaseSchema):
+    index: int
+    op: str
+    ok: bool
+    task_id: int | None = None
+    task: GetTaskSchema | None = None
+    detail: str | None = None
+
+
+class PriorityStatsSchema(BaseSchema):
+    priority: int
+    total: int
+    completed: int
+
+
+class TaskStatsSchema(BaseSchema):
+    total: int
+    completed: int
+    pending: int
+    by_priority: list[PriorityStatsSchema]
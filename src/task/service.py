@@ -1,63 +1,258 @@
+from datetime import datetime, timedelta, timezone
+
+from loguru import logger
+
+from src.task.models import RANK_REBALANCE_THRESHOLD
 from src.task.repository import TaskRepository
-from src.task.schemas import CreateTaskSchema, UpdateTaskSchema
+from src.task.schemas import (
+    BulkTaskOperationSchema,
+    CreateTaskSchema,
+    GetTaskSchema,
+    MoveTaskSchema,
+    UpdateTaskSchema,
+)
+from src.common.config import (
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_MAX_BATCHES,
+)
+from src.common.etag import weak_etag
+from src.common.events import event_hub
 from src.common.exceptions import TaskNotExist
+from src.common.export import csv_chunks, ndjson_chunks
+from src.common.pagination import DEFAULT_PAGE_SIZE
 
 
 class TaskService:
     def __init__(self, task_repository: TaskRepository):
         self.task_repository = task_repository
 
+    async def _publish(
+        self, user_id: int, event_type: str, task=None, task_id: int | None = None
+    ) -> None:
+        """Событие для живых обновлений; подписчики получат его после коммита."""
+        event = {"type": event_type, "task_id": task.id if task is not None else task_id}
+        if task is not None:
+            event["task"] = GetTaskSchema.model_validate(task).model_dump(mode="json")
+        await event_hub.publish(self.task_repository.session, user_id, event)
+
     async def create_task(self, task_data: CreateTaskSchema, user_id: int):
-        # Получаем максимальный текущий приоритет для пользователя
-        current_tasks = await self.task_repository.find_by_user(user_id)
-        max_priority = max((task.priority for task in current_tasks), default=0)
+        # Приоритет (max + 1) назначается в БД в той же транзакции, что и вставка
+        data = task_data.model_dump(exclude_unset=True, exclude={"priority"})
+        task = await self.task_repository.create_with_next_priority(data, user_id)
+        await self._publish(user_id, "task.created", task)
+        return task
 
-        data = task_data.model_dump(exclude_unset=True)
-        data["user_id"] = user_id
-        data["priority"] = max_priority + 1  # следующий приоритет
-        return await self.task_repository.create_one(data)
+    async def bulk_apply(
+        self, operations: list[BulkTaskOperationSchema], user_id: int
+    ) -> list[dict]:
+        prepared = []
+        for operation in operations:
+            data = (
+                operation.data.model_dump(exclude_unset=True)
+                if operation.data is not None
+                else {}
+            )
+            if operation.op == "create":
+                data = {
+                    key: value
+                    for key, value in data.items()
+                    if key in ("title", "description", "is_completed")
+                }
+            prepared.append((operation.op, operation.task_id, data))
+        results = await self.task_repository.bulk_apply(prepared, user_id)
+        event_types = {
+            "create": "task.created",
+            "update": "task.updated",
+            "complete": "task.completed",
+            "delete": "task.deleted",
+        }
+        for result in results:
+            if result["ok"]:
+                await self._publish(
+                    user_id,
+                    event_types[result["op"]],
+                    result.get("task"),
+                    result["task_id"],
+                )
+        return results
 
     async def update_task(
         self, task_id: int, task_data: UpdateTaskSchema, user_id: int
     ):
         data = task_data.model_dump(exclude_unset=True)
         try:
-            return await self.task_repository.update_one(task_id, data, user_id)
+            task = await self.task_repository.update_one(task_id, data, user_id)
         except Exception:
             raise TaskNotExist()
+        await self._publish(user_id, "task.updated", task)
+        return task
+
+    async def move_task(self, task_id: int, move_data: MoveTaskSchema, user_id: int):
+        """
+        Перемещает задачу перед/после другой задачи. Возвращает задачу и
+        флаг: пора перенумеровать ранги пользователя в фоне.
+        """
+        if task_id in (move_data.before_id, move_data.after_id):
+            return await self.task_repository.find_one_by_id(task_id, user_id), False
+        task, gap = await self.task_repository.move_one(
+            task_id, user_id, move_data.before_id, move_data.after_id
+        )
+        await self._publish(user_id, "task.moved", task)
+        return task, gap < RANK_REBALANCE_THRESHOLD
 
     async def delete_task(self, task_id: int, user_id: int):
         try:
-            return await self.task_repository.delete_one(task_id, user_id)
+            result = await self.task_repository.delete_one(task_id, user_id)
         except Exception:
             raise TaskNotExist()
+        await self._publish(user_id, "task.deleted", task_id=task_id)
+        return result
+
+    async def get_tasks_etag(self, user_id: int) -> str:
+        """
+        ETag задач пользователя по версии из users.tasks_version. Версию
+        нужно читать до самих задач: изменение между чтениями даст устаревший
+        тег со свежими данными, и клиент просто получит 200 на следующем опросе.
+        """
+        version = await self.task_repository.get_version(user_id)
+        return weak_etag("tasks", user_id, version)
 
     async def get_tasks(
         self,
         user_id: int,
         is_completed: bool | None = None,
         priority: int | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        as_rows: bool = False,
+    ):
+        items, next_cursor = await self.task_repository.find_by_status_and_priority(
+            user_id, is_completed, priority, limit, cursor, as_rows
+        )
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def search_tasks(
+        self,
+        user_id: int,
+        query: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
     ):
-        return await self.task_repository.find_by_status_and_priority(
-            user_id, is_completed, priority
+        items, next_cursor = await self.task_repository.search(
+            user_id, query, limit, cursor
         )
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def get_stats(self, user_id: int):
+        return await self.task_repository.get_stats(user_id)
 
     async def mark_task_as_completed(self, task_id: int, user_id: int):
         data = {"is_completed": True}
         try:
-            return await self.task_repository.update_one(task_id, data, user_id)
+            task = await self.task_repository.update_one(task_id, data, user_id)
         except Exception:
             raise TaskNotExist()
+        await self._publish(user_id, "task.completed", task)
+        return task
+
+    async def get_all_tasks(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        as_rows: bool = False,
+    ):
+        items, next_cursor = await self.task_repository.find_page(
+            limit, cursor, as_rows
+        )
+        return {"items": items, "next_cursor": next_cursor}
 
-    async def get_all_tasks(self):
-        return await self.task_repository.find_all()
+    def export_tasks(
+        self,
+        export_format: str,
+        user_id: int | None = None,
+        is_completed: bool | None = None,
+    ):
+        partitions = self.task_repository.stream_export(user_id, is_completed)
+        if export_format == "csv":
+            columns = [column.key for column in self.task_repository.export_columns]
+            return csv_chunks(columns, partitions)
+        return ndjson_chunks(partitions)
 
     async def admin_mark_task_as_completed(self, task_id: int):
         data = {"is_completed": True}
         try:
-            return await self.task_repository.admin_update_one(task_id, data)
+            task = await self.task_repository.admin_update_one(task_id, data)
         except Exception:
             raise TaskNotExist()
+        await self._publish(task.user_id, "task.completed", task)
+        return task
 
     async def get_task_by_id(self, task_id: int, user_id: int):
         return await self.task_repository.find_one_by_id(task_id, user_id)
+
+    async def get_archived_tasks(
+        self,
+        user_id: int,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        items, next_cursor = await self.task_repository.find_archived(
+            user_id, limit, cursor
+        )
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def restore_task(self, task_id: int, user_id: int):
+        task = await self.task_repository.restore_one(task_id, user_id)
+        await self._publish(user_id, "task.restored", task)
+        return task
+
+
+async def rebalance_task_ranks(user_id: int) -> None:
+    """Фоновая перенумерация рангов; своя сессия, т.к. запрос уже завершён."""
+    await TaskRepository().rebalance_ranks(user_id)
+
+
+async def rebuild_task_stats(user_id: int | None = None) -> int:
+    """
+    Сверка счётчиков статистики с таблицей tasks: для одного пользователя
+    или для всех по очереди, каждый в своей короткой транзакции.
+    Возвращает число пересчитанных пользователей.
+    """
+    repository = TaskRepository()
+    user_ids = (
+        [user_id] if user_id is not None else await repository.find_stats_user_ids()
+    )
+    for uid in user_ids:
+        await repository.rebuild_stats(uid)
+    logger.info(f"Task stats rebuilt for {len(user_ids)} users")
+    return len(user_ids)
+
+
+async def archive_completed_tasks(
+    after_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: int = ARCHIVE_MAX_BATCHES,
+) -> int:
+    """
+    Периодическая задача: переносит в архив задачи, завершённые больше
+    after_days дней назад. Каждая пачка — своя короткая транзакция, число
+    пачек за запуск ограничено, остаток перенесёт следующий запуск.
+    Возвращает число перенесённых задач.
+    """
+    repository = TaskRepository()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=after_days)
+    total = 0
+    for _ in range(max_batches):
+        archived = await repository.archive_batch(cutoff, batch_size)
+        for user_id, task_ids in archived.items():
+            # Без списка id: пачка не поместилась бы в payload NOTIFY
+            await event_hub.publish(
+                None, user_id, {"type": "tasks.archived", "count": len(task_ids)}
+            )
+        moved = sum(len(task_ids) for task_ids in archived.values())
+        total += moved
+        if moved < batch_size:
+            break
+    logger.info(f"Archived {total} completed tasks older than {after_days} days")
+    return total
@@ -1,11 +1,13 @@
 import logging
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from jose import jwt, JWTError
 
 from src.common.config import TOKEN_SECRET_KEY, JWT_SIGN_ALGORITHM
 from src.common.exceptions import UserAlreadyExistsException, UserCredentialsException
 from src.common.jwt_auth import send_password_reset_email
+from src.common.mailer import MailDispatcher, mail_dispatcher
+from src.common.rate_limit import RateLimiter, rate_limiter
 from src.user.dependencies import user_auth_service, user_service
 from src.user.schemas import (
     CreateUserSchema,
@@ -15,7 +17,7 @@ from src.user.schemas import (
     PasswordResetRequestSchema,
     PasswordResetConfirmSchema,
 )
-from src.user.service import UserAuthService
+from src.user.service import UserAuthService, UserService
 from src.common import jwt_auth
 
 auth_router = APIRouter(
@@ -28,8 +30,12 @@ auth_router = APIRouter(
 @auth_router.post("/register", response_model=LoginSuccessSchema)
 async def create_user_endpoint(
     user_data: CreateUserSchema,
+    request: Request,
     service: Annotated[UserAuthService, Depends(user_auth_service)],
+    limiter: Annotated[RateLimiter, Depends(rate_limiter)],
 ):
+    # До хеширования пароля; 429 не должен попасть в общий except ниже
+    await limiter.check("register", request)
     try:
         response = await service.register_user(user_data)
         return response
@@ -45,8 +51,12 @@ async def create_user_endpoint(
 @auth_router.post("/login", response_model=LoginSuccessSchema)
 async def login_for_token(
     user_data: LoginUserSchema,
+    request: Request,
     service: Annotated[UserAuthService, Depends(user_auth_service)],
+    limiter: Annotated[RateLimiter, Depends(rate_limiter)],
 ):
+    # По IP и по email, до поиска пользователя и проверки bcrypt
+    await limiter.check("login", request, user_data.email)
     try:
         response = await service.authenticate_user(user_data)
         return response
@@ -75,27 +85,34 @@ async def logout_endpoint(
 
 
 @auth_router.post("/reset_password")
-async def password_reset_request(data: PasswordResetRequestSchema):
-    user = await user_service().user_repository.find_by_email(data.email)
+async def password_reset_request(
+    data: PasswordResetRequestSchema,
+    service: Annotated[UserService, Depends(user_service)],
+    dispatcher: Annotated[MailDispatcher, Depends(mail_dispatcher)],
+):
+    user = await service.user_repository.find_by_email(data.email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     token = jwt_auth.create_password_reset_token(user.email)
-    await send_password_reset_email(user.email, token)
+    send_password_reset_email(dispatcher, user.email, token)
     return {"message": "Password reset link sent"}
 
 
 @auth_router.post("/confirm_reset_password")
-async def password_reset_confirm(data: PasswordResetConfirmSchema):
+async def password_reset_confirm(
+    data: PasswordResetConfirmSchema,
+    service: Annotated[UserService, Depends(user_service)],
+):
     try:
         payload = jwt.decode(
             data.token, TOKEN_SECRET_KEY, algorithms=[JWT_SIGN_ALGORITHM]
         )
         email = payload.get("sub")
-        user = await user_service().user_repository.find_by_email(email)
+        user = await service.user_repository.find_by_email(email)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        new_hashed_password = jwt_auth.get_password_hash(data.new_password)
-        await user_service().user_repository.update_one(
+        new_hashed_password = await jwt_auth.hash_password(data.new_password)
+        await service.user_repository.update_one(
             user.id, {"password": new_hashed_password}
         )
         return {"message": "Password has been updated"}
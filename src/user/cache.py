@@ -0,0 +1,36 @@
+from src.common.cache import TTLCache
+from src.common.config import USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS
+from src.common.metrics import registry
+from src.user.models import User
+
+
+class AuthenticatedUserCache(TTLCache[User]):
+    """
+    Кэш пользователей, найденных по subject (email) JWT-токена.
+    Дополнительно индексирует записи по id, чтобы изменения пользователя
+    можно было инвалидировать, не зная его прежнего email.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        super().__init__(max_size, ttl)
+        self._email_by_id: dict[int, str] = {}
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.generation += 1
+        email = self._email_by_id.get(user_id)
+        if email is not None:
+            self.invalidate(email)
+
+    def _on_set(self, key: str, value: User) -> None:
+        self._email_by_id[value.id] = key
+
+    def _on_discard(self, key: str, value: User) -> None:
+        if self._email_by_id.get(value.id) == key:
+            del self._email_by_id[value.id]
+
+
+user_cache = AuthenticatedUserCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS)
+
+registry.gauge("user_cache_size", "Cached authenticated users", lambda: len(user_cache))
+registry.gauge("user_cache_hits", "Authenticated user cache hits", lambda: user_cache.hits)
+registry.gauge("user_cache_misses", "Authenticated user cache misses", lambda: user_cache.misses)
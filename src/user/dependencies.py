@@ -1,8 +1,13 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.common.database import get_db_session
 from src.user.repository import UserRepository
 from src.user.service import UserAuthService, UserService
 
-def user_auth_service() -> UserAuthService:
-    return UserAuthService(UserRepository())
 
-def user_service() -> UserService:
-    return UserService(UserRepository())
+def user_auth_service(session: AsyncSession = Depends(get_db_session)) -> UserAuthService:
+    return UserAuthService(UserRepository(session))
+
+
+def user_service(session: AsyncSession = Depends(get_db_session)) -> UserService:
+    return UserService(UserRepository(session))
@@ -22,5 +22,10 @@ class User(Base):
         onupdate=datetime.utcnow,
         nullable=False,
     )
+    # Версия списка задач пользователя: растёт при каждом изменении его
+    # задач, служит ETag для GET /tasks без обращения к таблице tasks
+    tasks_version: Mapped[int] = mapped_column(
+        sa.BigInteger, default=0, server_default="0", nullable=False
+    )
 
     tasks = relationship("Task", back_populates="user", cascade="all, delete-orphan")
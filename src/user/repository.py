@@ -1,12 +1,43 @@
-from sqlalchemy import select
-from src.common.database import async_session_maker
+from sqlalchemy import lambda_stmt, select
+from src.common.database import note_write, run_after_commit
 from src.common.repository import SQLAlchemyRepository
+from src.user.cache import user_cache
 from src.user.models import User
 
 class UserRepository(SQLAlchemyRepository):
     model: type[User] = User
+    # Хеш пароля в выгрузку не попадает
+    row_columns = (User.id, User.email)
+    export_columns = (User.id, User.email, User.created_at, User.updated_at)
 
     async def find_by_email(self, email: str) -> User | None:
-        async with async_session_maker() as session:
-            result = await session.execute(select(self.model).where(self.model.email == email))
-            return result.scalar_one_or_none()
+        # lambda_stmt: конструкция и ключ кэша компиляции строятся один раз
+        stmt = lambda_stmt(lambda: select(User).where(User.email == email))
+        async with self._read_session() as session:
+            result = await session.execute(stmt)
+            user = result.scalar_one_or_none()
+            from_replica = "replica" in session.info
+        if user is None and from_replica:
+            # Только что зарегистрированный пользователь может ещё не дойти
+            # до реплики: промах перепроверяется в основной БД
+            async with self._session() as session:
+                result = await session.execute(stmt)
+                user = result.scalar_one_or_none()
+        return user
+
+    def stream_export(self):
+        return self.stream_rows(self.export_columns)
+
+    async def update_one(self, id: int, data: dict):
+        # Изменение email/пароля должно сразу сбросить кэш авторизации
+        user_cache.invalidate_user(id)
+        user = await super().update_one(id, data)
+        run_after_commit(self.session, lambda: user_cache.invalidate_user(id))
+        note_write(self.session, id)
+        return user
+
+    async def delete_one(self, id: int):
+        user_cache.invalidate_user(id)
+        await super().delete_one(id)
+        run_after_commit(self.session, lambda: user_cache.invalidate_user(id))
+        note_write(self.session, id)
@@ -1,7 +1,10 @@
 import logging
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
+from src.common.config import FAST_JSON_RESPONSES
+from src.common.fast_json import rows_page_response
+from src.common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
 from src.user.dependencies import user_service
 from src.user.models import User
 from src.user.schemas import GetUserSchema, UpdateUserSchema
@@ -25,12 +28,19 @@ async def get_current_user_router(
 
 @user_router.get(
     "",
-    response_model=list[GetUserSchema],
+    response_model=Page[GetUserSchema],
     dependencies=[Depends(jwt_auth.get_current_user)],
 )
-async def get_users(service: Annotated[UserService, Depends(user_service)]):
+async def get_users(
+    service: Annotated[UserService, Depends(user_service)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+):
     try:
-        return await service.get_users()
+        page = await service.get_users(limit, cursor, FAST_JSON_RESPONSES)
+        if FAST_JSON_RESPONSES:
+            return rows_page_response(page, service.user_repository.row_columns)
+        return page
     except Exception as e:
         logging.exception(f"Error getting list of users. Error: {e}")
         raise HTTPException(status_code=400, detail="Error getting list of users")
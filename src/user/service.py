@@ -4,6 +4,8 @@ from fastapi.responses import JSONResponse
 from src.common import jwt_auth
 from src.common.config import MAIL_PASSWORD_APP
 from src.common.exceptions import UserCredentialsException
+from src.common.export import csv_chunks, ndjson_chunks
+from src.common.pagination import DEFAULT_PAGE_SIZE
 from src.user.repository import UserRepository
 from src.user.schemas import CreateUserSchema, LoginUserSchema, UpdateUserSchema
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
@@ -20,21 +22,23 @@ class UserAuthService:
 
     async def register_user(self, user_data: CreateUserSchema):
         # Регистрируем пользователя через jwt_auth
-        await jwt_auth.create_user(user_data.model_dump())
-        # Сразу логиним – возвращаем ответ с установкой cookie
-        access_token_response = await self.authenticate_user(
-            LoginUserSchema(email=user_data.email, password=user_data.password)
-        )
-        return access_token_response
+        user = await jwt_auth.create_user(user_data.model_dump(), self.user_repository)
+        # Сразу логиним – пароль только что захеширован, повторная
+        # проверка bcrypt не нужна, выдаём токен напрямую
+        return self._login_response(user.email)
 
     async def authenticate_user(self, user_data: LoginUserSchema):
         user = await self.user_repository.find_by_email(user_data.email)
         if not user:
             raise UserCredentialsException
-        check_pass = jwt_auth.verify_password(user_data.password, user.password)
+        check_pass = await jwt_auth.check_password(user_data.password, user.password)
         if not check_pass:
             raise UserCredentialsException
-        access_token = jwt_auth.create_access_token(email=user.email)
+        return self._login_response(user.email)
+
+    @staticmethod
+    def _login_response(email: str) -> JSONResponse:
+        access_token = jwt_auth.create_access_token(email=email)
         response = JSONResponse({"message": "Login successful"})
         response.set_cookie(
             key="authorization",
@@ -55,7 +59,7 @@ class UserAuthService:
         if not user:
             raise UserCredentialsException
 
-        check_pass = jwt_auth.verify_password(user_data.password, user.password)
+        check_pass = await jwt_auth.check_password(user_data.password, user.password)
         if not check_pass:
             raise UserCredentialsException
 
@@ -84,8 +88,23 @@ class UserService:
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
 
-    async def get_users(self):
-        return await self.user_repository.find_all()
+    async def get_users(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        as_rows: bool = False,
+    ):
+        items, next_cursor = await self.user_repository.find_page(
+            limit, cursor, as_rows
+        )
+        return {"items": items, "next_cursor": next_cursor}
+
+    def export_users(self, export_format: str):
+        partitions = self.user_repository.stream_export()
+        if export_format == "csv":
+            columns = [column.key for column in self.user_repository.export_columns]
+            return csv_chunks(columns, partitions)
+        return ndjson_chunks(partitions)
 
     async def get_user(self, user_id: int):
         return await self.user_repository.find_one(user_id)
@@ -94,7 +113,7 @@ class UserService:
         data = user_data.model_dump(exclude_unset=True)
         # Если обновляется пароль, его нужно хешировать
         if "password" in data and data["password"]:
-            data["password"] = jwt_auth.get_password_hash(data["password"])
+            data["password"] = await jwt_auth.hash_password(data["password"])
         return await self.user_repository.update_one(user_id, data)
 
     async def get_all_users(self):
@@ -0,0 +1,81 @@
+import asyncio
+import os
+
+import pytest
+
+# Тесты с БД идут только против явно заданной тестовой базы (DB_* из
+# окружения); остальным модулям приложения для импорта хватает заглушек
+DB_ENV = ("DB_HOST", "DB_PORT", "DB_NAME", "DB_USER", "DB_PASS")
+DB_CONFIGURED = all(os.environ.get(name) for name in DB_ENV)
+
+for name, value in zip(DB_ENV, ("localhost", "5432", "tasktracker", "postgres", "")):
+    os.environ.setdefault(name, value)
+
+from sqlalchemy import text  # noqa: E402
+
+from src.common.database import engine  # noqa: E402
+from src.task.models import Task  # noqa: E402, F401  регистрирует модели для relationship
+from src.user.models import User  # noqa: E402, F401
+
+requires_db = pytest.mark.skipif(
+    not DB_CONFIGURED, reason="test database is not configured (DB_*)"
+)
+
+# Домен почты засеянных тестами пользователей; их строки удаляются по нему
+SEED_EMAIL_DOMAIN = "pytest.invalid"
+
+
+def run_db(coro):
+    """
+    Выполняет корутину в отдельном event loop и закрывает пул: соединения
+    asyncpg привязаны к loop, в котором открыты.
+    """
+
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(wrapper())
+
+
+async def delete_seeded_users() -> None:
+    async with engine.begin() as conn:
+        for table in ("tasks", "tasks_archive"):
+            await conn.execute(
+                text(
+                    f"DELETE FROM {table} WHERE user_id IN "
+                    "(SELECT id FROM users WHERE email LIKE '%@' || :domain)"
+                ),
+                {"domain": SEED_EMAIL_DOMAIN},
+            )
+        await conn.execute(
+            text("DELETE FROM users WHERE email LIKE '%@' || :domain"),
+            {"domain": SEED_EMAIL_DOMAIN},
+        )
+
+
+async def seed_user(name: str) -> int:
+    async with engine.begin() as conn:
+        res = await conn.execute(
+            text(
+                """
+                INSERT INTO users (email, password, created_at, updated_at)
+                VALUES (:name || '@' || :domain, 'x', now(), now())
+                RETURNING id
+                """
+            ),
+            {"name": name, "domain": SEED_EMAIL_DOMAIN},
+        )
+        return res.scalar_one()
+
+
+@pytest.fixture
+def user_id(request) -> int:
+    """Пустой пользователь тестовой базы; удаляется вместе с задачами."""
+    if not DB_CONFIGURED:
+        pytest.skip("test database is not configured (DB_*)")
+    run_db(delete_seeded_users())
+    yield run_db(seed_user(request.node.name))
+    run_db(delete_seeded_users())
@@ -0,0 +1,19 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.common import jwt_auth
+from src.common.exceptions import AdminRequiredException
+
+
+def test_admin_email_passes(monkeypatch):
+    monkeypatch.setattr(jwt_auth, "ADMIN_EMAILS", frozenset({"admin@example.com"}))
+    user = SimpleNamespace(email="Admin@example.com")
+    assert asyncio.run(jwt_auth.get_current_admin(user)) is user
+
+
+def test_regular_user_is_forbidden(monkeypatch):
+    monkeypatch.setattr(jwt_auth, "ADMIN_EMAILS", frozenset({"admin@example.com"}))
+    with pytest.raises(AdminRequiredException):
+        asyncio.run(jwt_auth.get_current_admin(SimpleNamespace(email="user@example.com")))
@@ -0,0 +1,28 @@
+import asyncio
+
+from src.common.mailer import MailDispatcher
+
+
+def test_unexpected_error_does_not_stop_worker():
+    async def scenario():
+        dispatcher = MailDispatcher(idle_timeout=60)
+        delivered = []
+
+        async def deliver(message):
+            if message["To"] == "broken@example.com":
+                raise ValueError("unexpected")
+            delivered.append(message["To"])
+
+        dispatcher._deliver = deliver
+        dispatcher.start()
+        dispatcher.enqueue("broken@example.com", "subject", "body")
+        dispatcher.enqueue("first@example.com", "subject", "body")
+        await asyncio.wait_for(dispatcher._queue.join(), 1)
+        # Воркер жив и принимает новые письма после ошибки
+        dispatcher.enqueue("second@example.com", "subject", "body")
+        await asyncio.wait_for(dispatcher._queue.join(), 1)
+        assert not dispatcher._worker.done()
+        await dispatcher.stop()
+        return delivered
+
+    assert asyncio.run(scenario()) == ["first@example.com", "second@example.com"]
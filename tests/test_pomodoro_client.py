@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.common.exceptions import PomodoroUnavailableException
+from src.common.pomodoro_client import CircuitBreaker, PomodoroClient
+
+
+def half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.failures = 1
+    breaker.opened_at = time.monotonic() - 60
+    return breaker
+
+
+def make_client(handler, breaker: CircuitBreaker) -> PomodoroClient:
+    return PomodoroClient(
+        base_url="http://pomodoro",
+        max_retries=0,
+        breaker=breaker,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def test_cancelled_half_open_probe_releases_breaker():
+    async def scenario():
+        entered = asyncio.Event()
+
+        async def hanging(request):
+            entered.set()
+            await asyncio.Event().wait()
+
+        breaker = half_open_breaker()
+        client = make_client(hanging, breaker)
+        probe = asyncio.create_task(
+            client.request("GET", "/get-pomodoro-stats", {"userId": 1}, idempotent=True)
+        )
+        await entered.wait()
+        # Пока проба идёт, остальные вызовы отклоняются
+        with pytest.raises(PomodoroUnavailableException):
+            await client.request("GET", "/get-pomodoro-stats", {"userId": 2}, True)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        await client.aclose()
+
+        assert breaker.state == "half-open"
+        client = make_client(lambda request: httpx.Response(200, json={}), breaker)
+        response = await client.request(
+            "GET", "/get-pomodoro-stats", {"userId": 1}, idempotent=True
+        )
+        await client.aclose()
+        return response
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+
+
+def test_unexpected_error_in_probe_reopens_breaker():
+    def broken(request):
+        raise RuntimeError("boom")
+
+    async def scenario(breaker):
+        client = make_client(broken, breaker)
+        try:
+            with pytest.raises(RuntimeError):
+                await client.request("GET", "/get-started-pomodoro", {"userId": 1}, True)
+        finally:
+            await client.aclose()
+
+    breaker = half_open_breaker()
+    asyncio.run(scenario(breaker))
+    # Ошибка засчитана: цепь снова разомкнута, пробный слот свободен
+    assert breaker.state == "open"
+    breaker.opened_at -= breaker.reset_timeout
+    assert breaker.allow()
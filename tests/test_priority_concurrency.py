@@ -0,0 +1,39 @@
+import asyncio
+
+from sqlalchemy import text
+
+from conftest import run_db
+from src.common.database import engine
+from src.task.repository import TaskRepository
+
+TASKS = 50
+
+
+def test_concurrent_creates_get_priorities_one_to_n(user_id):
+    """
+    N одновременных create_with_next_priority одного пользователя, каждый
+    в своей транзакции: приоритеты ровно 1..N, ранги различны, счётчик
+    task_stats равен N.
+    """
+
+    async def scenario():
+        # Без сессии запроса каждый вызов открывает и коммитит свою транзакцию
+        repo = TaskRepository()
+        created = await asyncio.gather(
+            *(
+                repo.create_with_next_priority({"title": f"task {n}"}, user_id)
+                for n in range(TASKS)
+            )
+        )
+        async with engine.connect() as conn:
+            res = await conn.execute(
+                text("SELECT total FROM task_stats WHERE user_id = :user_id"),
+                {"user_id": user_id},
+            )
+            total = res.scalar_one_or_none()
+        return created, total
+
+    created, total = run_db(scenario())
+    assert sorted(task.priority for task in created) == list(range(1, TASKS + 1))
+    assert len({task.rank for task in created}) == TASKS
+    assert total == TASKS
@@ -0,0 +1,218 @@
+"""
+Регрессионная проверка планов запросов TaskRepository.
+
+Сессионная фикстура засевает в тестовую базу (DB_* из окружения) набор
+пользователей с большим числом задач и выполняет ANALYZE. Каждый случай
+вызывает один метод репозитория, перехватывает отправленный им SQL и
+прогоняет каждый запрос через EXPLAIN (FORMAT JSON). Любой Seq Scan по
+tasks или tasks_archive — провал случая. Засеянные строки удаляются в конце.
+"""
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from sqlalchemy import event, text
+
+from conftest import (
+    DB_CONFIGURED,
+    SEED_EMAIL_DOMAIN,
+    delete_seeded_users,
+    run_db,
+)
+from src.common.database import engine
+from src.common.exceptions import ItemNotExist, TaskNotExist
+from src.task.repository import TaskRepository
+
+USERS = 50
+TASKS_PER_USER = 2000
+CHECKED_TABLES = {"tasks", "tasks_archive"}
+
+
+async def seed() -> dict:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                """
+                INSERT INTO users (email, password, created_at, updated_at)
+                SELECT 'plans' || n || '@' || :domain, 'x', now(), now()
+                FROM generate_series(1, :users) AS n
+                """
+            ),
+            {"domain": SEED_EMAIL_DOMAIN, "users": USERS},
+        )
+        res = await conn.execute(
+            text("SELECT id FROM users WHERE email LIKE 'plans%@' || :domain"),
+            {"domain": SEED_EMAIL_DOMAIN},
+        )
+        user_ids = list(res.scalars())
+        await conn.execute(
+            text(
+                """
+                INSERT INTO tasks (title, description, priority, rank, is_completed,
+                                   user_id, created_at, updated_at)
+                SELECT 'task ' || n, 'seeded', n, n * 65536, n % 3 = 0, u.id, now(), now()
+                FROM users AS u, generate_series(1, :tasks) AS n
+                WHERE u.email LIKE 'plans%@' || :domain
+                """
+            ),
+            {"domain": SEED_EMAIL_DOMAIN, "tasks": TASKS_PER_USER},
+        )
+        # Архив того же размера, что и рабочий набор
+        await conn.execute(
+            text(
+                """
+                INSERT INTO tasks_archive (id, title, description, priority, rank,
+                                           is_completed, user_id, created_at, updated_at)
+                SELECT -row_number() OVER (), 'archived ' || n, 'seeded', n, n * 65536,
+                       true, u.id, now(), now()
+                FROM users AS u, generate_series(1, :tasks) AS n
+                WHERE u.email LIKE 'plans%@' || :domain
+                """
+            ),
+            {"domain": SEED_EMAIL_DOMAIN, "tasks": TASKS_PER_USER},
+        )
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE tasks"))
+        await conn.execute(text("ANALYZE tasks_archive"))
+        await conn.execute(text("ANALYZE users"))
+    user_id = user_ids[len(user_ids) // 2]
+    items, cursor = await TaskRepository().find_by_status_and_priority(
+        user_id, limit=50
+    )
+    return {
+        "user_id": user_id,
+        "task_id": items[0].id,
+        "anchor_id": items[10].id,
+        "cursor": cursor,
+    }
+
+
+@pytest.fixture(scope="session")
+def plan_data() -> dict:
+    if not DB_CONFIGURED:
+        pytest.skip("test database is not configured (DB_*)")
+    run_db(delete_seeded_users())
+    yield run_db(seed())
+    run_db(delete_seeded_users())
+
+
+# (имя, вызов репозитория, ожидаемое исключение): несуществующие id дают
+# бизнес-ошибку уже после запроса, другие исключения — провал случая
+CASES = [
+    ("find_one_by_id", lambda r, d: r.find_one_by_id(d["task_id"], d["user_id"]), None),
+    ("find_by_user", lambda r, d: r.find_by_user(d["user_id"]), None),
+    ("list_first_page", lambda r, d: r.find_by_status_and_priority(d["user_id"]), None),
+    (
+        "list_next_page",
+        lambda r, d: r.find_by_status_and_priority(d["user_id"], cursor=d["cursor"]),
+        None,
+    ),
+    (
+        "list_incomplete",
+        lambda r, d: r.find_by_status_and_priority(d["user_id"], is_completed=False),
+        None,
+    ),
+    (
+        "list_completed",
+        lambda r, d: r.find_by_status_and_priority(d["user_id"], is_completed=True),
+        None,
+    ),
+    (
+        "list_by_priority",
+        lambda r, d: r.find_by_status_and_priority(d["user_id"], priority=10),
+        None,
+    ),
+    ("search", lambda r, d: r.search(d["user_id"], "task 42"), None),
+    (
+        "create_next_priority",
+        lambda r, d: r.create_with_next_priority({"title": "plan check"}, d["user_id"]),
+        None,
+    ),
+    (
+        "move_one",
+        lambda r, d: r.move_one(d["task_id"], d["user_id"], after_id=d["anchor_id"]),
+        None,
+    ),
+    (
+        "update_one",
+        lambda r, d: r.update_one(d["task_id"], {"title": "x"}, d["user_id"]),
+        None,
+    ),
+    ("delete_one", lambda r, d: r.delete_one(-1, d["user_id"]), ItemNotExist),
+    # Срок в прошлом: план тот же, но ничего не переносится
+    (
+        "archive_batch",
+        lambda r, d: r.archive_batch(datetime(2000, 1, 1, tzinfo=timezone.utc), 1000),
+        None,
+    ),
+    ("find_archived", lambda r, d: r.find_archived(d["user_id"]), None),
+    ("restore_one", lambda r, d: r.restore_one(-1, d["user_id"]), TaskNotExist),
+]
+
+
+async def capture(call, expected_exception) -> list[tuple[str, object]]:
+    """Выполняет вызов репозитория и возвращает отправленные им запросы."""
+    statements: list[tuple[str, object]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        if expected_exception is None:
+            await call()
+        else:
+            with pytest.raises(expected_exception):
+                await call()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return [
+        (statement, parameters)
+        for statement, parameters in statements
+        if statement.lstrip().upper().startswith(
+            ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+        )
+    ]
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+async def explain(statement: str, parameters) -> list[dict]:
+    async with engine.connect() as conn:
+        res = await conn.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        )
+        raw = res.scalar_one()
+        await conn.rollback()
+    plan = raw if isinstance(raw, list) else orjson.loads(raw)
+    return list(_walk(plan[0]["Plan"]))
+
+
+async def plan_nodes(call, expected_exception) -> list[tuple[str, list[dict]]]:
+    captured = await capture(call, expected_exception)
+    return [
+        (statement, await explain(statement, parameters))
+        for statement, parameters in captured
+    ]
+
+
+@pytest.mark.parametrize(
+    "call, expected_exception",
+    [pytest.param(call, exc, id=name) for name, call, exc in CASES],
+)
+def test_no_seq_scan(plan_data, call, expected_exception):
+    repo = TaskRepository()
+    plans = run_db(plan_nodes(lambda: call(repo, plan_data), expected_exception))
+    assert plans, "no SQL captured"
+    for statement, nodes in plans:
+        seq = [
+            node["Relation Name"]
+            for node in nodes
+            if node["Node Type"] == "Seq Scan"
+            and node.get("Relation Name") in CHECKED_TABLES
+        ]
+        assert not seq, f"Seq Scan on {', '.join(seq)}:\n{statement}"
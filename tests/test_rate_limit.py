@@ -0,0 +1,190 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from conftest import requires_db, run_db
+from src.common import rate_limit
+from src.common.database import engine
+from src.common.exceptions import TooManyRequestsException
+from src.common.rate_limit import InMemoryBackend, PostgresBackend, RateLimiter
+from src.user import auth_router
+from src.user.schemas import LoginUserSchema
+
+KEY_PREFIX = "pytest:"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def take(backend: InMemoryBackend, key: str, capacity: float, rate: float) -> float:
+    return asyncio.run(backend.take(key, capacity, rate))
+
+
+def fake_request(host: str = "10.0.0.1", forwarded: str | None = None):
+    headers = {"x-forwarded-for": forwarded} if forwarded else {}
+    return SimpleNamespace(headers=headers, client=SimpleNamespace(host=host))
+
+
+def test_in_memory_bucket_spends_burst_then_refills(clock):
+    backend = InMemoryBackend(shards=4)
+    rate = 1 / 60
+    assert [take(backend, "a", 3, rate) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert take(backend, "a", 3, rate) == pytest.approx(60)
+    clock.now += 45
+    assert take(backend, "a", 3, rate) == pytest.approx(15)
+    clock.now += 15
+    assert take(backend, "a", 3, rate) == 0.0
+    # Другой ключ — своя корзина
+    assert take(backend, "b", 3, rate) == 0.0
+
+
+def test_in_memory_bucket_never_exceeds_capacity(clock):
+    backend = InMemoryBackend(shards=1)
+    take(backend, "a", 2, 1)
+    clock.now += 3600
+    assert [take(backend, "a", 2, 1) for _ in range(3)] == [0.0, 0.0, pytest.approx(1)]
+
+
+def test_evict_drops_refilled_buckets(clock):
+    backend = InMemoryBackend(shards=1, max_keys=100)
+    take(backend, "a", 2, 1)
+    take(backend, "b", 2, 1)
+    # Через секунду обе корзины снова полные и неотличимы от новых
+    clock.now += 1
+    take(backend, "c", 2, 1)
+    assert list(backend._shards[0]) == ["c"]
+
+
+def test_evict_bounds_shard_size_in_lru_order(clock):
+    backend = InMemoryBackend(shards=1, max_keys=3)
+    for key in "abcde":
+        take(backend, key, 5, 1 / 60)
+    assert len(backend) == 3
+    take(backend, "c", 5, 1 / 60)
+    take(backend, "f", 5, 1 / 60)
+    assert list(backend._shards[0]) == ["e", "c", "f"]
+
+
+def test_check_rounds_retry_after_up(clock):
+    limiter = RateLimiter(
+        InMemoryBackend(), enabled=True, ip_limit=(1, 1), email_limit=(10, 60)
+    )
+    request = fake_request()
+    asyncio.run(limiter.check("login", request))
+    clock.now += 0.25
+    with pytest.raises(TooManyRequestsException) as exc_info:
+        asyncio.run(limiter.check("login", request))
+    assert exc_info.value.status_code == 429
+    # Осталось 59.75 с ожидания
+    assert exc_info.value.headers["Retry-After"] == "60"
+
+
+def test_check_limits_email_across_ips(clock):
+    limiter = RateLimiter(
+        InMemoryBackend(), enabled=True, ip_limit=(10, 60), email_limit=(1, 1)
+    )
+    asyncio.run(limiter.check("login", fake_request("10.0.0.1"), "User@example.com"))
+    with pytest.raises(TooManyRequestsException):
+        asyncio.run(
+            limiter.check("login", fake_request("10.0.0.2"), "user@example.com")
+        )
+
+
+def test_check_uses_forwarded_ip_only_when_trusted(clock):
+    backend = InMemoryBackend()
+    limiter = RateLimiter(backend, enabled=True, ip_limit=(1, 1), email_limit=(1, 1))
+    asyncio.run(limiter.check("login", fake_request(forwarded="1.1.1.1")))
+    limiter.trust_forwarded = True
+    asyncio.run(limiter.check("login", fake_request(forwarded="2.2.2.2")))
+    with pytest.raises(TooManyRequestsException):
+        asyncio.run(limiter.check("login", fake_request(forwarded="2.2.2.2, 10.0.0.1")))
+
+
+def test_disabled_limiter_does_not_touch_backend():
+    class FailingBackend(InMemoryBackend):
+        async def take(self, key, capacity, rate):
+            raise AssertionError("backend must not be called")
+
+    limiter = RateLimiter(FailingBackend(), enabled=False)
+    asyncio.run(limiter.check("login", fake_request(), "user@example.com"))
+
+
+def test_login_rejects_before_password_check(clock):
+    class Service:
+        calls = 0
+
+        async def authenticate_user(self, user_data):
+            self.calls += 1
+            return {"message": "ok"}
+
+    service = Service()
+    limiter = RateLimiter(
+        InMemoryBackend(), enabled=True, ip_limit=(10, 60), email_limit=(1, 1)
+    )
+    user_data = LoginUserSchema(email="user@example.com", password="AB!cdef")
+
+    async def login():
+        return await auth_router.login_for_token(
+            user_data, fake_request(), service, limiter
+        )
+
+    asyncio.run(login())
+    # 429 не превращается в общий 400 и bcrypt не запускается
+    with pytest.raises(TooManyRequestsException):
+        asyncio.run(login())
+    assert service.calls == 1
+
+
+async def delete_test_buckets() -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM rate_limit_buckets WHERE key LIKE :prefix || '%'"),
+            {"prefix": KEY_PREFIX},
+        )
+
+
+@requires_db
+def test_postgres_backend_keeps_fractional_capacity():
+    async def scenario():
+        await delete_test_buckets()
+        backend = PostgresBackend(cleanup_probability=0)
+        try:
+            waits = [await backend.take(f"{KEY_PREFIX}frac", 2.5, 1 / 60) for _ in range(3)]
+            async with engine.connect() as conn:
+                res = await conn.execute(
+                    text("SELECT tokens FROM rate_limit_buckets WHERE key = :key"),
+                    {"key": f"{KEY_PREFIX}frac"},
+                )
+                tokens = res.scalar_one()
+        finally:
+            await delete_test_buckets()
+        return waits, tokens
+
+    waits, tokens = run_db(scenario())
+    # Ёмкость 2.5: два токена, остаток 0.5 и ожидание ~30 с до следующего
+    assert waits[:2] == [0.0, 0.0]
+    assert 29 < waits[2] <= 30
+    assert 0.5 <= tokens < 0.51
+
+
+@pytest.mark.parametrize(
+    "ip_limit, email_limit",
+    [((20, 0), (5, 1)), ((20, 10), (5, -1)), ((0.5, 10), (5, 1))],
+)
+def test_limiter_rejects_limits_without_refill(ip_limit, email_limit):
+    with pytest.raises(ValueError):
+        RateLimiter(InMemoryBackend(), ip_limit=ip_limit, email_limit=email_limit)
@@ -0,0 +1,68 @@
+import asyncio
+
+from conftest import run_db
+from src.task.repository import TaskRepository
+
+
+def test_cached_update_returns_fields_in_place(user_id):
+    """
+    UPDATE ... RETURNING задачи выполняется повторно из кэша компиляции:
+    поля возвращённой задачи не должны сдвигаться относительно колонок.
+    """
+
+    async def scenario():
+        repo = TaskRepository()
+        first = await repo.create_with_next_priority({"title": "first"}, user_id)
+        second = await repo.create_with_next_priority({"title": "second"}, user_id)
+        # Параллельные UPDATE одной формы: часть из них выполняется из
+        # кэша компиляции, скомпилированного для другого объекта запроса.
+        # Каждый набор колонок — отдельная запись кэша и отдельная попытка
+        tasks = [first, second]
+        for columns in (
+            ("priority", "is_completed"),
+            ("priority",),
+            ("is_completed",),
+            ("title", "priority"),
+            ("description", "is_completed"),
+            ("title", "description", "priority"),
+        ):
+            updates = [
+                (
+                    tasks[n % 2],
+                    {
+                        "title": tasks[n % 2].title,
+                        "description": f"update {n}",
+                        "priority": n % 4 + 1,
+                        "is_completed": n % 3 == 0,
+                    },
+                )
+                for n in range(30)
+            ]
+            updated = await asyncio.gather(
+                *(
+                    repo.update_one(
+                        task.id, {name: values[name] for name in columns}, user_id
+                    )
+                    for task, values in updates
+                )
+            )
+            for (task, values), result in zip(updates, updated):
+                assert (result.id, result.user_id, result.title) == (
+                    task.id, user_id, task.title
+                )
+                if "priority" in columns:
+                    assert result.priority == values["priority"]
+                if "is_completed" in columns:
+                    assert result.is_completed == values["is_completed"]
+        for completed in (True, False):
+            task = await repo.admin_update_one(
+                second.id, {"is_completed": completed}
+            )
+            assert (task.id, task.user_id, task.is_completed) == (
+                second.id, user_id, completed
+            )
+        for _ in range(2):
+            task, _gap = await repo.move_one(first.id, user_id, after_id=second.id)
+            assert (task.id, task.user_id, task.title) == (first.id, user_id, "first")
+
+    run_db(scenario())
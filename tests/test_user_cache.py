@@ -0,0 +1,44 @@
+import asyncio
+
+from sqlalchemy import text
+
+from conftest import requires_db
+from src.common import jwt_auth
+from src.common.database import async_session_maker, engine
+from src.task.models import Task  # noqa: F401  регистрирует модель для relationship
+from src.user.cache import user_cache
+
+EMAIL = "user@user-cache-check.invalid"
+
+
+@requires_db
+def test_cached_user_survives_request_rollback():
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO users (email, password, created_at, updated_at) "
+                    "VALUES (:email, 'x', now(), now()) ON CONFLICT DO NOTHING"
+                ),
+                {"email": EMAIL},
+            )
+        user_cache.invalidate(EMAIL)
+        try:
+            # Запрос, загрузивший пользователя, завершается ошибкой и откатом
+            async with async_session_maker() as session:
+                await session.begin()
+                user = await jwt_auth.get_cached_user(EMAIL, session)
+                await session.rollback()
+            cached = await jwt_auth.get_cached_user(EMAIL)
+            return user, cached.email
+        finally:
+            user_cache.invalidate(EMAIL)
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text("DELETE FROM users WHERE email = :email"), {"email": EMAIL}
+                )
+            await engine.dispose()
+
+    user, email = asyncio.run(scenario())
+    assert email == EMAIL
+    assert user.email == EMAIL